@@ -0,0 +1,49 @@
+"""
+测试脚本共享的aiohttp会话
+所有测试文件复用同一个连接池：TLS握手、DNS解析只做一次
+"""
+import asyncio
+import atexit
+
+import aiohttp
+
+_SESSION = None
+_LOOP = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    惰性创建模块级共享的ClientSession
+
+    调用方不要close返回的会话——keep-alive连接留给后续测试复用，
+    进程退出时由atexit统一关闭。aiohttp会话绑定事件循环，
+    跨asyncio.run边界调用时自动重建。
+    """
+    global _SESSION, _LOOP
+    loop = asyncio.get_running_loop()
+    if _SESSION is not None and not _SESSION.closed and _LOOP is not loop:
+        # 旧事件循环已结束，其连接也随之失效；分离connector避免__del__告警
+        _SESSION.detach()
+    if _SESSION is None or _SESSION.closed or _LOOP is not loop:
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit_per_host=32,
+                ttl_dns_cache=600,
+                use_dns_cache=True,
+                force_close=False,
+            )
+        )
+        _LOOP = loop
+    return _SESSION
+
+
+def _close_at_exit():
+    if _SESSION is None or _SESSION.closed:
+        return
+    if _LOOP is not None and not _LOOP.is_closed():
+        _LOOP.run_until_complete(_SESSION.close())
+    else:
+        asyncio.run(_SESSION.close())
+
+
+atexit.register(_close_at_exit)
@@ -12,15 +12,16 @@ class Config:
     def __init__(self, config_path: str = "config/config.yaml"):
         self.config_path = Path(config_path)
         self._config: Dict[str, Any] = {}
+        self._flat: Dict[str, Any] = {}
         self.load()
-    
+
     def load(self):
         """加载配置文件"""
         if not self.config_path.exists():
             print(f"⚠️  配置文件不存在: {self.config_path}，使用默认配置")
             self._load_default_config()
             return
-        
+
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 self._config = yaml.safe_load(f) or {}
@@ -28,6 +29,27 @@ class Config:
         except (FileNotFoundError, yaml.YAMLError, IOError) as e:
             print(f"❌ 加载配置文件失败: {e}，使用默认配置")
             self._load_default_config()
+            return
+        self._flatten()
+
+    def _flatten(self):
+        """把嵌套配置预展开成点号路径的扁平字典
+
+        get()在热路径上（SSE重连等）被反复调用，展开后每次查询
+        只需一次哈希查找，不必再split+逐层下钻。中间节点也入表，
+        以便 get('server') 这类取子树的调用照常工作。
+        """
+        flat: Dict[str, Any] = {}
+
+        def walk(prefix: str, node: Dict[str, Any]):
+            for k, v in node.items():
+                dotted = f"{prefix}{k}"
+                flat[dotted] = v
+                if isinstance(v, dict):
+                    walk(f"{dotted}.", v)
+
+        walk("", self._config)
+        self._flat = flat
     
     def _load_default_config(self):
         """加载默认配置"""
@@ -61,21 +83,12 @@ class Config:
                 'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
             }
         }
-    
+        self._flatten()
+
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置值，支持点号分隔的路径"""
-        keys = key.split('.')
-        value = self._config
-        
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-                if value is None:
-                    return default
-            else:
-                return default
-        
-        return value
+        value = self._flat.get(key)
+        return default if value is None else value
     
     @property
     def server_host(self) -> str:
@@ -144,21 +144,26 @@ class PerformanceHistoryDB:
     """演奏历史数据库操作"""
     
     @staticmethod
-    def create(session: Session, **kwargs) -> PerformanceHistory:
+    def create(session: Session, commit: bool = True, **kwargs) -> PerformanceHistory:
         """
         创建新记录
-        
-        如果未提供id，将自动生成一个唯一ID
+
+        如果未提供id，将自动生成一个唯一ID。
+        commit=False时只flush不提交，调用方可以把多次插入合并进
+        同一个事务，最后session.commit()一次（COMMIT/fsync只付一次）
         """
         # 如果没有提供id，自动生成
         if 'id' not in kwargs or not kwargs['id']:
             from src.utils import generate_id
             kwargs['id'] = generate_id()
-        
+
         record = PerformanceHistory(**kwargs)
         session.add(record)
-        session.commit()
-        session.refresh(record)
+        if commit:
+            session.commit()
+            session.refresh(record)
+        else:
+            session.flush()
         return record
     
     @staticmethod
@@ -288,10 +288,10 @@ def save_separate_hand_fingerings(left_midi_file, right_midi_file, output_dir, s
         print(f"右手: {len(right_result)}个音符, 移动距离: {right_move:.2f}, 移动次数: {right_count}")
     
     # 统计小拇指键类型使用情况
-    left_pinky_normal = sum(1 for r in left_result if r['finger'] == 5 and r.get('pinky_key_type', 'normal') == 'normal')
-    left_pinky_extended = sum(1 for r in left_result if r['finger'] == 5 and r.get('pinky_key_type', 'normal') == 'extended')
-    right_pinky_normal = sum(1 for r in right_result if r['finger'] == 5 and r.get('pinky_key_type', 'normal') == 'normal')
-    right_pinky_extended = sum(1 for r in right_result if r['finger'] == 5 and r.get('pinky_key_type', 'normal') == 'extended')
+    left_pinky_normal = sum(1 for r in left_result if r.finger == 5 and r.pinky_key_type == 'normal')
+    left_pinky_extended = sum(1 for r in left_result if r.finger == 5 and r.pinky_key_type == 'extended')
+    right_pinky_normal = sum(1 for r in right_result if r.finger == 5 and r.pinky_key_type == 'normal')
+    right_pinky_extended = sum(1 for r in right_result if r.finger == 5 and r.pinky_key_type == 'extended')
     
     # ==================== 保存左手指法文件 ====================
     left_output_file = os.path.join(output_dir, f"{song_name}_left_hand_fingering.txt")
@@ -318,14 +318,12 @@ def save_separate_hand_fingerings(left_midi_file, right_midi_file, output_dir, s
         f.write("序号\t音符\t白键索引\t机械臂位置\t手指\t小拇指键\t开始时间\t持续时间\t结束时间\t强度\n")
         for i, result in enumerate(left_result):
             # 添加小拇指键类型显示
-            pinky_str = ""
-            if result['finger'] == 5:
-                pinky_type = result.get('pinky_key_type', 'normal')
-                pinky_str = "扩展" if pinky_type == 'extended' else "基础"
+            if result.finger == 5:
+                pinky_str = "扩展" if result.pinky_key_type == 'extended' else "基础"
             else:
                 pinky_str = "-"
-            
-            f.write(f"{i+1}\t{result['note']}\t{result['white_key_index']}\t{result['arm_position']}\t{result['finger']}\t{pinky_str}\t{result['start_time']:.2f}s\t{result['duration']:.2f}s\t{result['end_time']:.2f}s\t{result['velocity']}\n")
+
+            f.write(f"{i+1}\t{result.note}\t{result.white_key_index}\t{result.arm_position}\t{result.finger}\t{pinky_str}\t{result.start_time:.2f}s\t{result.duration:.2f}s\t{result.end_time:.2f}s\t{result.velocity}\n")
     
     # 保存左手JSON格式
     left_json_file = os.path.join(output_dir, f"{song_name}_left_hand_fingering.json")
@@ -345,7 +343,8 @@ def save_separate_hand_fingerings(left_midi_file, right_midi_file, output_dir, s
             'pinky_normal_count': left_pinky_normal,
             'pinky_extended_count': left_pinky_extended,
             'generated_time': datetime.now().isoformat(),
-            'fingering_data': left_result
+            # FingerRow是NamedTuple，转dict保持JSON结构不变
+            'fingering_data': [r._asdict() for r in left_result]
         }, f, indent=2, ensure_ascii=False)
     
     # ==================== 保存右手指法文件 ====================
@@ -370,14 +369,12 @@ def save_separate_hand_fingerings(left_midi_file, right_midi_file, output_dir, s
         f.write("序号\t音符\t白键索引\t机械臂位置\t手指\t小拇指键\t开始时间\t持续时间\t结束时间\t强度\n")
         for i, result in enumerate(right_result):
             # 添加小拇指键类型显示
-            pinky_str = ""
-            if result['finger'] == 5:
-                pinky_type = result.get('pinky_key_type', 'normal')
-                pinky_str = "扩展" if pinky_type == 'extended' else "基础"
+            if result.finger == 5:
+                pinky_str = "扩展" if result.pinky_key_type == 'extended' else "基础"
             else:
                 pinky_str = "-"
-            
-            f.write(f"{i+1}\t{result['note']}\t{result['white_key_index']}\t{result['arm_position']}\t{result['finger']}\t{pinky_str}\t{result['start_time']:.2f}s\t{result['duration']:.2f}s\t{result['end_time']:.2f}s\t{result['velocity']}\n")
+
+            f.write(f"{i+1}\t{result.note}\t{result.white_key_index}\t{result.arm_position}\t{result.finger}\t{pinky_str}\t{result.start_time:.2f}s\t{result.duration:.2f}s\t{result.end_time:.2f}s\t{result.velocity}\n")
     
     # 保存右手JSON格式
     right_json_file = os.path.join(output_dir, f"{song_name}_right_hand_fingering.json")
@@ -393,7 +390,8 @@ def save_separate_hand_fingerings(left_midi_file, right_midi_file, output_dir, s
             'pinky_extended_count': right_pinky_extended,
             'transposed_octave': transpose_right_octave,  # ⭐ 记录是否升八度
             'generated_time': datetime.now().isoformat(),
-            'fingering_data': right_result
+            # FingerRow是NamedTuple，转dict保持JSON结构不变
+            'fingering_data': [r._asdict() for r in right_result]
         }, f, indent=2, ensure_ascii=False)
     
     # ==================== 保存统计摘要文件 ====================
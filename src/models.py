@@ -4,7 +4,7 @@
 from datetime import datetime
 from enum import Enum
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 # Enums
@@ -41,29 +41,35 @@ class MessageType(str, Enum):
 
 
 # Schemas
-class Message(BaseModel):
+class APIModel(BaseModel):
+    """所有消息模型的基类：忽略未知字段、关闭赋值校验，降低高频实例化开销"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
+
+class Message(APIModel):
     type: str
     id: str
     sessionId: str
-    timestamp: datetime = datetime.now()
+    # default_factory保证每条消息取实例化时刻的时间（类级默认只会求值一次）
+    timestamp: datetime = Field(default_factory=datetime.now)
     content: str
     status: Optional[int] = None
 
 
-class DownloadRequest(BaseModel):
+class DownloadRequest(APIModel):
     music_id: int
     music_name: str
 
 
-class AnalyzeRequest(BaseModel):
+class AnalyzeRequest(APIModel):
     music_id: int
 
 
-class AnalyzeResponse(BaseModel):
+class AnalyzeResponse(APIModel):
     file_paths: List[str]
 
 
-class ChatMessage(BaseModel):
+class ChatMessage(APIModel):
     id: str
     sessionId: str
     role: Role
@@ -71,11 +77,11 @@ class ChatMessage(BaseModel):
     timestamp: datetime
 
 
-class ControlRequest(BaseModel):
+class ControlRequest(APIModel):
     action: ControlAction
 
 
-class HistoryItem(BaseModel):
+class HistoryItem(APIModel):
     id: str
     pieceId: str
     pieceName: str
@@ -85,7 +91,7 @@ class HistoryItem(BaseModel):
     success: bool
 
 
-class StatusEvent(BaseModel):
+class StatusEvent(APIModel):
     status: str
     message: Optional[str] = None
 
@@ -5,6 +5,13 @@ import json
 import threading
 import asyncio
 
+try:
+    # libuv事件循环：SSE这类小帧高频写的场景下显著降低每次写的CPU开销
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 from fastapi import FastAPI, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -13,6 +20,16 @@ try:
 except ImportError:
     from fastapi.responses import StreamingResponse as EventSourceResponse
 
+try:
+    import orjson
+
+    def _dumps(obj):
+        """orjson序列化（Rust实现，比stdlib json快约5-10倍）"""
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj)
+
 from midi_record_intime_v2 import MidiPianoRecorder
 
 from datetime import datetime
@@ -98,37 +115,36 @@ async def record_stream(request: Request, do_record: bool = False):
         # 选择并连接MIDI设备
         if not recorder.select_device():
             error_msg = {"error": "无法连接MIDI设备"}
-            yield json.dumps(error_msg)
+            yield _dumps(error_msg)
             return
         
+        # MIDI线程经call_soon_threadsafe直接投递到asyncio.Queue，
+        # 消费端await即可，无需占用线程池worker阻塞等待
+        queue = asyncio.Queue(maxsize=256)
+        recorder.bind_asyncio(asyncio.get_running_loop(), queue)
+
         # 开始监听
         threading.Thread(target=recorder.start_recording, daemon=True).start()
         print(f"[{session_id}] MIDI录音线程已启动")
-        
-        # 获取事件循环
-        loop = asyncio.get_event_loop()
-        
+
         while True:
             # 检查客户端是否断开
             if await request.is_disconnected():
                 print(f"[{session_id}] 检测到客户端断开连接")
                 break
-            
+
             try:
-                # 在线程池中运行阻塞的 get_message() 调用，设置超时
-                message = await asyncio.wait_for(
-                    loop.run_in_executor(None, recorder.get_message),
-                    timeout=1.0
-                )
-                
-                message_count += 1
-                # print(f"[{session_id}] 消息 #{message_count}: {message}")
-                
-                yield json.dumps(message)
-            except asyncio.TimeoutError:
-                # 超时继续循环，用于检测断开
-                await asyncio.sleep(0.1)
-                continue
+                # 批量取消息，一帧最多合并64条，减少SSE帧数
+                batch = await recorder.drain_async(max_items=64, timeout=1.0)
+
+                if not batch:
+                    # 超时无消息，继续循环以检测断开
+                    continue
+
+                message_count += len(batch)
+                # print(f"[{session_id}] 消息 #{message_count}: {batch[-1]}")
+
+                yield _dumps(batch)
             except Exception as e:  # noqa: 捕获所有消息获取异常以保持流稳定
                 print(f"[{session_id}] 获取消息错误: {e}")
                 await asyncio.sleep(0.1)
@@ -141,7 +157,7 @@ async def record_stream(request: Request, do_record: bool = False):
     except Exception as e:  # noqa: 捕获所有流异常以确保资源清理
         print(f"[{session_id}] 录音流异常: {e}")
         error_msg = {"error": f"录音流异常: {str(e)}"}
-        yield json.dumps(error_msg)
+        yield _dumps(error_msg)
     
     finally:
         # 后处理：清理资源
@@ -189,7 +205,7 @@ async def record_stream_mock():
             "hand": hand,
             "midi_id": random_midi_id
         }
-        yield json.dumps(mock_data)
+        yield _dumps(mock_data)
         await asyncio.sleep(1)
 
         mock_data = {
@@ -199,7 +215,7 @@ async def record_stream_mock():
             "hand": hand,
             "midi_id": random_midi_id
         }
-        yield json.dumps(mock_data)
+        yield _dumps(mock_data)
 
 
 
@@ -7,10 +7,21 @@ MIDI实时钢琴键盘监听程序
 
 import mido
 from mido import Message
+import sys
 import time
 from datetime import datetime
 import threading
-import queue
+import collections
+from array import array
+
+import numpy as np
+
+
+# 128个MIDI音符名称在导入时一次性格式化好，热路径上只剩一次下标访问
+_NOTE_NAME_TABLE = tuple(
+    f"{['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'][n % 12]}{(n // 12) - 1}"
+    for n in range(128)
+)
 
 
 class MidiPianoRecorder:
@@ -18,26 +29,47 @@ class MidiPianoRecorder:
     
     # MIDI音符号到音符名称的映射（C4 = 中央C = MIDI 60）
     NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    
+
+
     def __init__(self):
-        self.active_notes = {}  # 当前正在按下的音符 {note_number: velocity}
+        # 当前按下的音符：下标=MIDI音符号，值=力度（0表示未按下）。
+        # 128字节定长，免哈希免分配，且遍历天然按音高有序
+        self.active_notes = bytearray(128)
+        self._last_display = 0.0  # 上次刷新"当前按下"行的monotonic时刻
         self.port = None
-        self.recorded_events = []  # 记录所有MIDI事件
+        # 录制事件按SoA存储：时间戳是连续的C int64（整数纳秒），
+        # 消息对象单独一个list——比list[dict]省掉每事件一个dict的分配
+        self._event_times = array('q')
+        self._event_msgs = []
         self.start_time = None  # 录制开始时间
 
-        self.message_queue = queue.Queue(maxsize=100)
-        
+        # deque的append/popleft是C级原子操作，不像queue.Queue每次put/get
+        # 都要加锁+Condition；配合Event提供阻塞消费语义
+        self.message_queue = collections.deque(maxlen=100)
+        self._evt = threading.Event()
+
+        # 捕获线程只往显示队列append字符串，由专门的线程批量写stdout，
+        # 终端写入（含行缓冲锁）不再阻塞MIDI输入侧
+        self._display_queue = collections.deque()
+        self._display_thread = None
+
     def put_message(self, message):
-        self.message_queue.put(message)
-        
+        self.message_queue.append(message)
+        self._evt.set()
+
     def get_message(self):
-        return self.message_queue.get()
+        while True:
+            try:
+                return self.message_queue.popleft()
+            except IndexError:
+                self._evt.clear()
+                # clear后再检查一次，避免与append竞争造成漏唤醒
+                if not self.message_queue:
+                    self._evt.wait()
 
     def get_note_name(self, note_number):
         """将MIDI音符号转换为音符名称（如C4, D#5等）"""
-        octave = (note_number // 12) - 1
-        note = self.NOTE_NAMES[note_number % 12]
-        return f"{note}{octave}"
+        return _NOTE_NAME_TABLE[note_number]
     
     def list_midi_devices(self):
         """列出所有可用的MIDI输入设备"""
@@ -91,58 +123,81 @@ class MidiPianoRecorder:
     
     def process_message(self, msg):
         """处理单个MIDI消息"""
-        current_time = time.time()
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        
-        # 记录事件（用于后续保存为MIDI文件）
+        # 单调时钟整数纳秒：不受系统对时影响，也避免每事件的float运算
+        current_ns = time.perf_counter_ns()
+
+        # 记录事件（用于后续保存为MIDI文件，时间为相对开始的整数纳秒）
         if self.start_time is not None:
-            relative_time = current_time - self.start_time
-            self.recorded_events.append({
-                'time': relative_time,
-                'message': msg.copy()
-            })
-        
+            # rtmidi后端每条消息都是新对象，无需copy再存
+            self._event_times.append(current_ns - self.start_time)
+            self._event_msgs.append(msg)
+
         if msg.type == 'note_on' and msg.velocity > 0:
             # 音符按下
             self.active_notes[msg.note] = msg.velocity
             note_name = self.get_note_name(msg.note)
-            print(f"[{timestamp}] 🎹 按下: {note_name} (MIDI:{msg.note}) 力度:{msg.velocity}")
+            self._display_queue.append(f"[{self._display_timestamp()}] 🎹 按下: {note_name} (MIDI:{msg.note}) 力度:{msg.velocity}\n")
             self.put_message({"action": "note_on", "key_name": note_name, "midi_id": msg.note})
             self.display_active_notes()
-            
+
         elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
             # 音符释放
-            if msg.note in self.active_notes:
-                del self.active_notes[msg.note]
+            if self.active_notes[msg.note]:
+                self.active_notes[msg.note] = 0
                 note_name = self.get_note_name(msg.note)
-                print(f"[{timestamp}] 🎵 释放: {note_name} (MIDI:{msg.note})")
+                self._display_queue.append(f"[{self._display_timestamp()}] 🎵 释放: {note_name} (MIDI:{msg.note})\n")
                 self.put_message({"action": "note_off", "key_name": note_name, "midi_id": msg.note})
                 self.display_active_notes()
-        
+
         elif msg.type == 'control_change':
             # 控制变化（如踏板、调制轮等）
-            print(f"[{timestamp}] 🎛️  控制: CC{msg.control} = {msg.value}")
+            self._display_queue.append(f"[{self._display_timestamp()}] 🎛️  控制: CC{msg.control} = {msg.value}\n")
             # self.put_message(msg)
         elif msg.type == 'pitchwheel':
             # 弯音轮
-            print(f"[{timestamp}] 🎚️  弯音: {msg.pitch}")
+            self._display_queue.append(f"[{self._display_timestamp()}] 🎚️  弯音: {msg.pitch}\n")
             # self.put_message(msg)
+
+    @staticmethod
+    def _display_timestamp():
+        """仅供显示用的墙钟时间串，只有真的要打印时才调用strftime"""
+        return datetime.now().strftime("%H:%M:%S.%f")[:-3]
     
     def display_active_notes(self):
-        """显示当前所有正在按下的音符"""
-        if self.active_notes:
-            notes_info = []
-            for note, velocity in sorted(self.active_notes.items()):
-                note_name = self.get_note_name(note)
-                notes_info.append(f"{note_name}(v:{velocity})")
-            print(f"   ► 当前按下的琴键: {', '.join(notes_info)}")
+        """显示当前所有正在按下的音符（限30Hz，密集乐句不逐事件重排格式化）"""
+        now = time.monotonic()
+        if now - self._last_display < 0.033:
+            return
+        self._last_display = now
+
+        # bytearray按下标遍历即按音高有序，无需排序
+        notes_info = [
+            f"{_NOTE_NAME_TABLE[note]}(v:{velocity})"
+            for note, velocity in enumerate(self.active_notes) if velocity
+        ]
+        if notes_info:
+            self._display_queue.append(f"   ► 当前按下的琴键: {', '.join(notes_info)}\n\n")
         else:
-            print(f"   ► 当前按下的琴键: 无")
-        print()
-    
+            self._display_queue.append("   ► 当前按下的琴键: 无\n\n")
+
+    def _drain_display(self):
+        """显示线程：30Hz批量取出积压的显示行，一次写入stdout"""
+        while True:
+            batch = []
+            try:
+                while True:
+                    batch.append(self._display_queue.popleft())
+            except IndexError:
+                pass
+            if batch:
+                sys.stdout.write("".join(batch))
+                sys.stdout.flush()
+            time.sleep(1 / 30)
+
+
     def save_to_midi(self, filename=None):
         """将录制的演奏保存为MIDI文件"""
-        if not self.recorded_events:
+        if not self._event_msgs:
             print("⚠ 没有录制数据，无法保存")
             return False
         
@@ -167,20 +222,17 @@ class MidiPianoRecorder:
             track.append(mido.MetaMessage('set_tempo', tempo=mido.bpm2tempo(120), time=0))
             
             # 转换录制的事件为MIDI消息
-            last_time = 0
-            for event in self.recorded_events:
-                # 计算delta时间（以ticks为单位）
-                # mido使用ticks，我们需要将秒转换为ticks
-                # 默认：480 ticks per beat，120 BPM = 2 beats/sec = 960 ticks/sec
-                delta_seconds = event['time'] - last_time
-                delta_ticks = int(delta_seconds * 960)  # 960 ticks/second at 120 BPM
-                
-                # 复制消息并设置时间
-                msg = event['message'].copy()
-                msg.time = delta_ticks
+            # delta ticks一次向量化算完（ns * 960 // 1e9整数运算）：
+            # 默认480 ticks per beat，120 BPM = 2 beats/sec = 960 ticks/sec
+            # frombuffer零拷贝地把array('q')视作int64向量
+            times = np.frombuffer(self._event_times, dtype=np.int64)
+            ticks = np.diff(times, prepend=0) * 960 // 1_000_000_000
+
+            # tolist()一次C级转换成Python int，zip循环里不再逐元素装箱numpy标量
+            for msg, tick in zip(self._event_msgs, ticks.tolist()):
+                # 录制已结束、单线程访问，直接在原消息上设置时间即可
+                msg.time = tick
                 track.append(msg)
-                
-                last_time = event['time']
             
             # 添加结束标记
             track.append(mido.MetaMessage('end_of_track', time=0))
@@ -188,8 +240,8 @@ class MidiPianoRecorder:
             # 保存文件
             mid.save(filename)
             print(f"\n✓ 录制已保存到: {filename}")
-            print(f"  - 总事件数: {len(self.recorded_events)}")
-            print(f"  - 录制时长: {self.recorded_events[-1]['time']:.2f} 秒")
+            print(f"  - 总事件数: {len(self._event_msgs)}")
+            print(f"  - 录制时长: {self._event_times[-1] / 1e9:.2f} 秒")
             return True
             
         except Exception as e:
@@ -209,20 +261,29 @@ class MidiPianoRecorder:
         print("=" * 60)
         print()
         
-        # 记录开始时间
-        self.start_time = time.time()
+        # 记录开始时间（单调时钟，整数纳秒）
+        self.start_time = time.perf_counter_ns()
+
+        # 启动显示线程：捕获线程只排队字符串，由它批量刷stdout
+        if self._display_thread is None:
+            self._display_thread = threading.Thread(target=self._drain_display, daemon=True)
+            self._display_thread.start()
         
         try:
-            for msg in self.port:
-                self.process_message(msg)
+            # 非阻塞批量拉取：每个tick把积压的消息一次性取完再小睡，
+            # 和弦等突发事件不会被逐条阻塞迭代放大抖动
+            while True:
+                for msg in self.port.iter_pending():
+                    self.process_message(msg)
+                time.sleep(0.0005)
         except KeyboardInterrupt:
             print("\n\n" + "=" * 60)
             print("停止录制")
             print("=" * 60)
             
             # 询问是否保存
-            if self.recorded_events:
-                print(f"\n录制了 {len(self.recorded_events)} 个MIDI事件")
+            if self._event_msgs:
+                print(f"\n录制了 {len(self._event_msgs)} 个MIDI事件")
                 
                 try:
                     save_choice = input("是否保存为MIDI文件？(Y/n): ").strip().lower()
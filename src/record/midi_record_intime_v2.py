@@ -10,40 +10,214 @@ from mido import Message
 import time
 from datetime import datetime
 
-import queue
+import asyncio
+import collections
+import threading
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # numba未安装时退回NumPy向量化实现
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _compute_deltas(times, tps):
+        """把事件绝对时间（秒）转换为相邻事件的delta ticks（JIT编译）"""
+        out = np.empty(times.shape[0], dtype=np.int32)
+        last = 0.0
+        for i in range(times.shape[0]):
+            out[i] = np.int32((times[i] - last) * tps)
+            last = times[i]
+        return out
+else:
+    def _compute_deltas(times, tps):
+        """把事件绝对时间（秒）转换为相邻事件的delta ticks（NumPy实现）"""
+        return (np.diff(times, prepend=0.0) * tps).astype(np.int32)
+
+
+# 可录制的消息类型编码（实时消息/系统独占消息不进录制缓冲）
+_TYPE_CODE = {'note_on': 0, 'note_off': 1, 'control_change': 2, 'pitchwheel': 3}
+
+# 128个MIDI音符名称预先格式化好，get_note_name只剩一次元组索引
+_NOTE_NAME_TABLE = tuple(
+    f"{['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'][n % 12]}{(n // 12) - 1}"
+    for n in range(128)
+)
+
+# 本地时区偏移（纳秒），用于把time_ns快速格式化为本地时间
+_TZ_OFFSET_NS = time.localtime().tm_gmtoff * 1_000_000_000
+
+
+def _format_timestamp(ns):
+    """用整数divmod把time_ns格式化为HH:MM:SS.mmm（避开datetime+strftime）"""
+    local_ns = ns + _TZ_OFFSET_NS
+    ms = (local_ns // 1_000_000) % 1000
+    total_s = local_ns // 1_000_000_000
+    return f"{(total_s // 3600) % 24:02d}:{(total_s // 60) % 60:02d}:{total_s % 60:02d}.{ms:03d}"
+
+
+# MIDI端口枚举要走系统接口（ALSA/CoreMIDI），动辄几十毫秒，短TTL缓存一下
+_PORTS_CACHE = {'t': 0.0, 'names': None}
+
+
+def _get_input_names_cached(ttl=2.0):
+    """带TTL缓存的mido.get_input_names()，频繁重连时不必每次重扫端口"""
+    now = time.monotonic()
+    if _PORTS_CACHE['names'] is not None and now - _PORTS_CACHE['t'] < ttl:
+        return _PORTS_CACHE['names']
+    names = mido.get_input_names()
+    _PORTS_CACHE['t'] = now
+    _PORTS_CACHE['names'] = names
+    return names
 
 
 class MidiPianoRecorder:
     """MIDI钢琴记录器"""
-    
+
     # MIDI音符号到音符名称的映射（C4 = 中央C = MIDI 60）
     NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    
-    def __init__(self):
+
+    def __init__(self, debug=False):
         self.active_notes = {}  # 当前正在按下的音符 {note_number: velocity}
         self.port = None
-        self.recorded_events = []  # 记录所有MIDI事件
-        self.start_time = None  # 录制开始时间
+        # 录制缓冲采用SoA布局：每个事件只占几个字节的并行数组，
+        # 几何倍增扩容，保存时才重建mido Message对象
+        self._times = np.empty(4096, np.float64)   # 相对开始时间（秒）
+        self._types = np.empty(4096, np.uint8)     # _TYPE_CODE编码
+        self._chans = np.empty(4096, np.uint8)     # MIDI通道
+        self._data1 = np.empty(4096, np.int16)     # note / control / pitch
+        self._data2 = np.empty(4096, np.int16)     # velocity / value
+        self._n = 0  # 已录制事件数
+        self.start_time = None  # 录制开始时间（time_ns整数）
         self.split_point = 60  # 中央C (MIDI 60) 作为左右手分界点
         self.left_hand_count = 0  # 左手音符计数
         self.right_hand_count = 0  # 右手音符计数
+        self.debug = debug  # 是否在MIDI线程上打印实时信息
+        self._last_display_ns = 0  # 上次刷新按键显示的时间（节流用）
 
+        # 生产者（MIDI线程）只做deque.append（C级原子操作，无锁），
+        # 时间戳格式化、音名转换等都推迟到消费者侧的get_message完成
+        self._ring = collections.deque(maxlen=100)
+        self._evt = threading.Event()
+        # 消费者过慢时丢弃最旧消息（deque maxlen语义），此处只做计数
+        self._dropped = 0
 
-        self.message_queue = queue.Queue(maxsize=100)
+        # 消息类型 -> 处理函数的分发表（一次dict查找替代逐个字符串比较）
+        self._dispatch = {
+            'note_on': self._on_note_on,
+            'note_off': self._on_note_off,
+            'control_change': self._on_control_change,
+            'pitchwheel': self._on_pitchwheel,
+        }
 
+        # 绑定asyncio后，MIDI线程改为call_soon_threadsafe直接投递到
+        # 事件循环，消费端无需再占用线程池worker阻塞等待
+        self._loop = None
+        self._q = None
+
+    def bind_asyncio(self, loop, queue):
+        """绑定asyncio事件循环与队列，后续消息直接投递给async消费端"""
+        self._loop = loop
+        self._q = queue
+
+    def put_message(self, raw):
+        """MIDI线程入队原始元组 (action, note, velocity, wall_time)"""
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._enqueue_nowait, raw)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+            return
+        # deque带maxlen：满时append自动挤掉最旧一条，生产者永不阻塞
+        if len(self._ring) == self._ring.maxlen:
+            self._dropped += 1
+        self._ring.append(raw)
+        self._evt.set()
+
+    def _enqueue_nowait(self, raw):
+        """在事件循环线程中投递消息（队列满时丢最旧的一条）"""
+        try:
+            self._q.put_nowait(raw)
+        except asyncio.QueueFull:
+            try:
+                self._q.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self._q.put_nowait(raw)
+            self._dropped += 1
+
+    async def drain_async(self, max_items=64, timeout=1.0):
+        """
+        异步批量取消息：等到首条后把积压一并弹出并格式化
+
+        需先调用bind_asyncio；超时无消息返回空列表，供调用方检测断开。
+        """
+        try:
+            raw = await asyncio.wait_for(self._q.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [self._format_raw(raw)]
+        while len(batch) < max_items:
+            try:
+                batch.append(self._format_raw(self._q.get_nowait()))
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    def drain(self, max_items=64, timeout=0.02):
+        """
+        批量取消息：最多等待timeout秒，一次弹出至多max_items条并格式化
+
+        供SSE端批量消费，把多条MIDI消息合并成一帧发送。
+        """
+        if not self._ring:
+            self._evt.clear()
+            # clear后再检查一次，避免与append竞争造成漏唤醒
+            if not self._ring:
+                self._evt.wait(timeout)
+
+        batch = []
+        while len(batch) < max_items:
+            try:
+                raw = self._ring.popleft()
+            except IndexError:
+                break
+            batch.append(self._format_raw(raw))
+        return batch
 
-    def put_message(self, message):
-        self.message_queue.put(message)
-        
     def get_message(self):
-        return self.message_queue.get()
-        
+        """阻塞取出一条消息，并在消费者侧格式化为dict"""
+        while True:
+            try:
+                raw = self._ring.popleft()
+            except IndexError:
+                self._evt.clear()
+                # clear后再检查一次，避免与append竞争造成漏唤醒
+                if not self._ring:
+                    self._evt.wait()
+                continue
+            return self._format_raw(raw)
+
+    def _format_raw(self, raw):
+        """把生产者入队的原始元组格式化为对外的消息dict"""
+        action, note, _velocity, wall_ns = raw
+        return {
+            "action": action,
+            "key_name": self.get_note_name(note),
+            "midi_id": note,
+            "timestamp": _format_timestamp(wall_ns),
+            "hand": self.get_hand_label(note),
+        }
+
+
     def get_note_name(self, note_number):
         """将MIDI音符号转换为音符名称（如C4, D#5等）"""
-        octave = (note_number // 12) - 1
-        note = self.NOTE_NAMES[note_number % 12]
-        return f"{note}{octave}"
-    
+        return _NOTE_NAME_TABLE[note_number]
+
     def get_hand_label(self, note_number):
         """判断音符是左手还是右手弹奏（基于音高分割点）"""
         if note_number < self.split_point:
@@ -56,8 +230,8 @@ class MidiPianoRecorder:
         print("=" * 60)
         print("可用的MIDI输入设备：")
         print("=" * 60)
-        input_names = mido.get_input_names()
-        
+        input_names = _get_input_names_cached()
+
         if not input_names:
             print("未找到任何MIDI输入设备！")
             print("请确保：")
@@ -101,53 +275,97 @@ class MidiPianoRecorder:
             print(f"✗ 无效的设备编号: {device_index}")
             return False
     
+    def _grow(self):
+        """录制缓冲写满时倍增扩容"""
+        new_cap = self._times.shape[0] * 2
+        self._times = np.resize(self._times, new_cap)
+        self._types = np.resize(self._types, new_cap)
+        self._chans = np.resize(self._chans, new_cap)
+        self._data1 = np.resize(self._data1, new_cap)
+        self._data2 = np.resize(self._data2, new_cap)
+
+    def _record_event(self, msg, relative_time):
+        """把消息的原始字段写入SoA录制缓冲（不复制mido对象）"""
+        code = _TYPE_CODE.get(msg.type)
+        if code is None:
+            return  # 实时消息/sysex等不可保存类型不录制
+
+        if self._n == self._times.shape[0]:
+            self._grow()
+
+        i = self._n
+        self._times[i] = relative_time
+        self._types[i] = code
+        self._chans[i] = getattr(msg, 'channel', 0)
+        if code <= 1:
+            self._data1[i] = msg.note
+            self._data2[i] = msg.velocity
+        elif code == 2:
+            self._data1[i] = msg.control
+            self._data2[i] = msg.value
+        else:
+            self._data1[i] = msg.pitch
+            self._data2[i] = 0
+        self._n = i + 1
+
     def process_message(self, msg):
-        """处理单个MIDI消息"""
-        current_time = time.time()
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        
+        """处理单个MIDI消息（热路径：按类型查表分发，只做一次dict查找）"""
+        current_ns = time.time_ns()
+
         # 记录事件（用于后续保存为MIDI文件）
         if self.start_time is not None:
-            relative_time = current_time - self.start_time
-            self.recorded_events.append({
-                'time': relative_time,
-                'message': msg.copy()
-            })
-        
-        if msg.type == 'note_on' and msg.velocity > 0:
-            # 音符按下
-            self.active_notes[msg.note] = msg.velocity
-            note_name = self.get_note_name(msg.note)
-            hand = self.get_hand_label(msg.note)
-            
-            # 统计左右手使用次数
-            if msg.note < self.split_point:
-                self.left_hand_count += 1
-            else:
-                self.right_hand_count += 1
-            
-            print(f"[{timestamp}] 🎹 按下: {note_name} (MIDI:{msg.note}) 力度:{msg.velocity} {hand}")
-            self.put_message({"action": "note_on", "key_name": note_name, "midi_id": msg.note, "timestamp": timestamp, "hand": hand})
-            self.display_active_notes()
-            
-        elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
-            # 音符释放
-            if msg.note in self.active_notes:
-                del self.active_notes[msg.note]
-                note_name = self.get_note_name(msg.note)
-                hand = self.get_hand_label(msg.note)
-                print(f"[{timestamp}] 🎵 释放: {note_name} (MIDI:{msg.note}) {hand}")
-                self.put_message({"action": "note_off", "key_name": note_name, "midi_id": msg.note, "timestamp": timestamp, "hand": hand})
-                self.display_active_notes()
-        
-        elif msg.type == 'control_change':
-            # 控制变化（如踏板、调制轮等）
-            print(f"[{timestamp}] 🎛️  控制: CC{msg.control} = {msg.value}")
-            
-        elif msg.type == 'pitchwheel':
-            # 弯音轮
-            print(f"[{timestamp}] 🎚️  弯音: {msg.pitch}")
-    
+            self._record_event(msg, (current_ns - self.start_time) * 1e-9)
+
+        handler = self._dispatch.get(msg.type)
+        if handler is not None:
+            handler(msg, current_ns)
+
+    def _on_note_on(self, msg, current_ns):
+        """音符按下（velocity=0的note_on按MIDI惯例视为释放）"""
+        if msg.velocity == 0:
+            self._on_note_off(msg, current_ns)
+            return
+
+        self.active_notes[msg.note] = msg.velocity
+
+        # 统计左右手使用次数
+        if msg.note < self.split_point:
+            self.left_hand_count += 1
+        else:
+            self.right_hand_count += 1
+
+        self.put_message(("note_on", msg.note, msg.velocity, current_ns))
+        if self.debug:
+            print(f"[{_format_timestamp(current_ns)}] 🎹 按下: {self.get_note_name(msg.note)} (MIDI:{msg.note}) 力度:{msg.velocity} {self.get_hand_label(msg.note)}")
+            self._maybe_display(current_ns)
+
+    def _on_note_off(self, msg, current_ns):
+        """音符释放"""
+        if msg.note in self.active_notes:
+            del self.active_notes[msg.note]
+            self.put_message(("note_off", msg.note, 0, current_ns))
+            if self.debug:
+                print(f"[{_format_timestamp(current_ns)}] 🎵 释放: {self.get_note_name(msg.note)} (MIDI:{msg.note}) {self.get_hand_label(msg.note)}")
+                self._maybe_display(current_ns)
+
+    def _on_control_change(self, msg, current_ns):
+        """控制变化（如踏板、调制轮等）"""
+        if self.debug:
+            print(f"[{_format_timestamp(current_ns)}] 🎛️  控制: CC{msg.control} = {msg.value}")
+
+    def _on_pitchwheel(self, msg, current_ns):
+        """弯音轮"""
+        if self.debug:
+            print(f"[{_format_timestamp(current_ns)}] 🎚️  弯音: {msg.pitch}")
+
+
+    def _maybe_display(self, current_ns):
+        """节流的按键显示：50ms内最多刷新一次，密集和弦不再逐事件排序+刷屏"""
+        if current_ns - self._last_display_ns < 50_000_000:
+            return
+        self._last_display_ns = current_ns
+        self.display_active_notes()
+
     def display_active_notes(self):
         """显示当前所有正在按下的音符（按左右手分组显示）"""
         if self.active_notes:
@@ -206,7 +424,7 @@ class MidiPianoRecorder:
     
     def save_to_midi(self, filename=None):
         """将录制的演奏保存为MIDI文件"""
-        if not self.recorded_events:
+        if self._n == 0:
             print("⚠ 没有录制数据，无法保存")
             return False
         
@@ -229,62 +447,47 @@ class MidiPianoRecorder:
             
             # 设置速度 (120 BPM)
             track.append(mido.MetaMessage('set_tempo', tempo=mido.bpm2tempo(120), time=0))
-            
-            # 实时消息列表（这些消息不能保存到MIDI文件中）
-            realtime_messages = [
-                'clock',           # 0xF8 - 时钟
-                'start',           # 0xFA - 启动
-                'continue',        # 0xFB - 继续
-                'stop',            # 0xFC - 停止
-                'active_sensing',  # 0xFE - 活动感知
-                'reset'            # 0xFF - 系统重置
-            ]
-            
-            # 转换录制的事件为MIDI消息
-            last_time = 0
-            saved_count = 0
-            skipped_count = 0
-            
-            for event in self.recorded_events:
-                msg = event['message']
-                
-                # 跳过实时消息
-                if msg.type in realtime_messages:
-                    skipped_count += 1
-                    print(f"⚠️  跳过实时消息: {msg.type}")
-                    continue
-                
-                # 跳过系统独占消息（可选）
-                if msg.type == 'sysex':
-                    skipped_count += 1
-                    continue
-                
-                # 计算delta时间（以ticks为单位）
-                # mido使用ticks，我们需要将秒转换为ticks
-                # 默认：480 ticks per beat，120 BPM = 2 beats/sec = 960 ticks/sec
-                delta_seconds = event['time'] - last_time
-                delta_ticks = int(delta_seconds * 960)  # 960 ticks/second at 120 BPM
-                
-                # 复制消息并设置时间
-                msg_copy = msg.copy()
-                msg_copy.time = delta_ticks
-                track.append(msg_copy)
-                
-                last_time = event['time']
-                saved_count += 1
-            
+
+            # 实时消息/sysex在录制时就已被过滤，缓冲中全部可保存
+            n = self._n
+
+            # 计算delta时间（以ticks为单位）
+            # mido使用ticks，我们需要将秒转换为ticks
+            # 默认：480 ticks per beat，120 BPM = 2 beats/sec = 960 ticks/sec
+            # 对连续数组做一次性转换（960 ticks/second at 120 BPM）
+            deltas = _compute_deltas(self._times[:n], 960)
+
+            # 从SoA缓冲重建mido消息
+            types = self._types
+            chans = self._chans
+            data1 = self._data1
+            data2 = self._data2
+            for i in range(n):
+                code = types[i]
+                delta_ticks = int(deltas[i])
+                channel = int(chans[i])
+                if code == 0:
+                    msg = Message('note_on', note=int(data1[i]), velocity=int(data2[i]),
+                                  channel=channel, time=delta_ticks)
+                elif code == 1:
+                    msg = Message('note_off', note=int(data1[i]), velocity=int(data2[i]),
+                                  channel=channel, time=delta_ticks)
+                elif code == 2:
+                    msg = Message('control_change', control=int(data1[i]), value=int(data2[i]),
+                                  channel=channel, time=delta_ticks)
+                else:
+                    msg = Message('pitchwheel', pitch=int(data1[i]),
+                                  channel=channel, time=delta_ticks)
+                track.append(msg)
+
             # 添加结束标记
             track.append(mido.MetaMessage('end_of_track', time=0))
-            
+
             # 保存文件
             mid.save(filename)
             print(f"\n✓ 录制已保存到: {filename}")
-            print(f"  - 总事件数: {len(self.recorded_events)}")
-            print(f"  - 已保存事件: {saved_count}")
-            if skipped_count > 0:
-                print(f"  - 跳过实时消息: {skipped_count} 条")
-            if self.recorded_events:
-                print(f"  - 录制时长: {self.recorded_events[-1]['time']:.2f} 秒")
+            print(f"  - 已保存事件: {n}")
+            print(f"  - 录制时长: {self._times[n-1]:.2f} 秒")
             return True
             
         except Exception as e:
@@ -308,7 +511,7 @@ class MidiPianoRecorder:
         print()
         
         # 记录开始时间
-        self.start_time = time.time()
+        self.start_time = time.time_ns()
         
         try:
             for msg in self.port:
@@ -322,8 +525,8 @@ class MidiPianoRecorder:
             self.display_hand_statistics()
             
             # 询问是否保存
-            if self.recorded_events:
-                print(f"\n录制了 {len(self.recorded_events)} 个MIDI事件")
+            if self._n:
+                print(f"\n录制了 {self._n} 个MIDI事件")
                 
                 try:
                     save_choice = input("是否保存为MIDI文件？(Y/n): ").strip().lower()
@@ -358,8 +561,8 @@ def main():
     ╚══════════════════════════════════════════════════════════╝
     """)
     
-    recorder = MidiPianoRecorder()
-    
+    recorder = MidiPianoRecorder(debug=True)
+
     # 选择并连接MIDI设备
     if recorder.select_device():
         # 开始监听
@@ -20,7 +20,9 @@ def main():
         "api:app",
         host="0.0.0.0",
         port=8123,
-        reload=True,
+        reload=False,            # reload的stat轮询会不停唤醒事件循环
+        loop="uvloop",           # C实现的事件循环，socket I/O快2-4倍
+        http="httptools",        # C实现的HTTP解析器
         timeout_keep_alive=120,  # 保持连接时间
         ws_ping_interval=None,   # 禁用 WebSocket ping
         ws_ping_timeout=None     # 禁用 WebSocket ping 超时
@@ -1,7 +1,8 @@
 """
 工具函数
 """
-import uuid
+import functools
+import time
 import os
 from datetime import datetime
 try:
@@ -15,10 +16,19 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 
 from typing import Optional, List, Tuple, Dict, Any, AsyncIterator
+import shutil
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import aiofiles
 import httpx
+try:
+    import orjson
+except ImportError:
+    # orjson未安装时退回stdlib json路径
+    orjson = None
 
 # JWT配置 - 可以从config读取
 def get_jwt_config():
@@ -35,13 +45,13 @@ security = HTTPBearer()
 
 
 def generate_id() -> str:
-    """生成唯一ID"""
-    return str(uuid.uuid4())
+    """生成唯一ID（os.urandom比uuid4省去版本位拼装和连字符格式化）"""
+    return os.urandom(16).hex()
 
 
 def generate_session_id() -> str:
     """生成会话ID"""
-    return f"session_{uuid.uuid4().hex[:16]}"
+    return f"session_{os.urandom(8).hex()}"
 
 
 def get_current_timestamp() -> datetime:
@@ -49,6 +59,18 @@ def get_current_timestamp() -> datetime:
     return datetime.now()
 
 
+@functools.lru_cache(maxsize=4096)
+def _decode_cached(token: str) -> dict:
+    """解码并验证签名（HMAC验签每次约零点几毫秒，同一token无需重复做）
+
+    过期时间不在这里校验——缓存结果会跨时间复用，exp由调用方每次检查。
+    """
+    return jwt.decode(
+        token, SECRET_KEY, algorithms=[ALGORITHM],
+        options={"verify_exp": False},
+    )
+
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
     """
     验证JWT Token
@@ -71,8 +93,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(security))
     
     token = credentials.credentials
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        payload = _decode_cached(token)
     except JWTError as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -80,6 +101,16 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(security))
             headers={"WWW-Authenticate": "Bearer"},
         ) from exc
 
+    # 过期检查每次都做，不能依赖缓存时刻的结果
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
 
 def create_access_token(data: dict) -> str:
     """
@@ -92,6 +123,24 @@ def create_access_token(data: dict) -> str:
     return encoded_jwt
 
 
+def _walk_scandir(top: str):
+    """迭代式scandir遍历，产出(相对目录, DirEntry)
+
+    DirEntry自带name/path且is_dir结果来自readdir缓存，
+    比os.walk + 逐文件os.path.join少一大截字符串/stat开销。
+    """
+    stack = [(top, "")]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                yield rel_dir, entry
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(
+                        (entry.path, f"{rel_dir}/{entry.name}" if rel_dir else entry.name)
+                    )
+
+
 def upload_folder_to_remote_linux(local_dir: str, remote_dir: str, host: str, user: str, password: str, keep_folder_name: bool = True):
     """
     将本地文件夹上传到远程Linux服务器
@@ -126,66 +175,132 @@ def upload_folder_to_remote_linux(local_dir: str, remote_dir: str, host: str, us
     else:
         final_remote_dir = remote_dir
         print(f"📤 开始上传文件夹内容: {local_dir} → {final_remote_dir}")
-    
+
+    # 优先走rsync：整个目录树在一条连接上流水线传输（且只传变化部分），
+    # 避免逐文件SFTP往返的 O(文件数×RTT) 开销
+    if shutil.which("rsync") and shutil.which("sshpass"):
+        src = local_dir if keep_folder_name else local_dir + "/"
+        result = subprocess.run(
+            [
+                "rsync", "-az",
+                "-e", f"sshpass -p {password} ssh -o StrictHostKeyChecking=no",
+                src, f"{user}@{host}:{remote_dir}/",
+            ],
+            capture_output=True, text=True,
+        )
+        if result.returncode == 0:
+            print(f"✅ rsync上传完成: {final_remote_dir}")
+            return
+        print(f"⚠️  rsync上传失败（{result.stderr.strip()}），回退到SFTP逐文件上传")
+
     c = Connection(host=host, user=user, connect_kwargs={"password": password})
-    
+    extra_conns = []  # 工作线程各自的SFTP连接，结束时统一关闭
+
     try:
-        # 首先确保目标目录存在
-        print(f"📁 创建远程目录: {final_remote_dir}")
-        c.run(f"mkdir -p {final_remote_dir}", hide=True)
-        
-        # 遍历本地目录
-        file_count = 0
-        for root, _dirs, files in os.walk(local_dir):
-            # 计算相对路径
-            rel_path = os.path.relpath(root, local_dir)
-            
-            # 构建远程路径（处理 . 的情况）
-            if rel_path == '.':
-                remote_current_dir = final_remote_dir
+        # 一次scandir遍历收集远程目录和 (本地文件, 远程文件) 清单，
+        # 远程路径直接f-string拼接（已是POSIX风格，无需join+replace）
+        remote_dirs = [final_remote_dir]
+        file_pairs = []
+        for rel_dir, entry in _walk_scandir(local_dir):
+            prefix = f"{final_remote_dir}/{rel_dir}" if rel_dir else final_remote_dir
+            if entry.is_dir(follow_symlinks=False):
+                remote_dirs.append(f"{prefix}/{entry.name}")
             else:
-                remote_current_dir = os.path.join(final_remote_dir, rel_path).replace("\\", "/")
-            
-            # 创建远程目录（包括所有子目录）
-            if remote_current_dir != final_remote_dir:  # 避免重复创建根目录
-                print(f"📁 创建远程子目录: {remote_current_dir}")
-                c.run(f"mkdir -p {remote_current_dir}", hide=True)
-            
-            # 上传当前目录下的所有文件
-            for file_name in files:
-                local_file_path = os.path.join(root, file_name)
-                remote_file_path = os.path.join(remote_current_dir, file_name).replace("\\", "/")
-                
-                try:
-                    print(f"📤 上传文件: {os.path.basename(local_file_path)} → {remote_file_path}")
-                    c.put(local_file_path, remote=remote_file_path)
-                    file_count += 1
-                except Exception as e:
-                    print(f"❌ 上传失败: {local_file_path} - {e}")
-        
+                file_pairs.append((entry.path, f"{prefix}/{entry.name}"))
+
+        # 所有远程目录用一条命令批量创建，而不是每个目录一次SSH exec
+        print(f"📁 创建远程目录: {final_remote_dir}（共{len(remote_dirs)}个）")
+        c.run("mkdir -p " + " ".join(f"'{d}'" for d in remote_dirs), hide=True)
+
+        # 单条SFTP连接会串行化传输，按线程各开一条连接并行put
+        tls = threading.local()
+
+        def _put_file(pair):
+            local_file_path, remote_file_path = pair
+            conn = getattr(tls, 'conn', None)
+            if conn is None:
+                conn = Connection(host=host, user=user, connect_kwargs={"password": password})
+                extra_conns.append(conn)
+                tls.conn = conn
+            try:
+                print(f"📤 上传文件: {os.path.basename(local_file_path)} → {remote_file_path}")
+                conn.put(local_file_path, remote=remote_file_path)
+                return True
+            except Exception as e:
+                print(f"❌ 上传失败: {local_file_path} - {e}")
+                return False
+
+        file_count = 0
+        if file_pairs:
+            max_workers = min(8, len(file_pairs))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                file_count = sum(executor.map(_put_file, file_pairs))
+
         print(f"✅ 上传完成！共上传 {file_count} 个文件到 {final_remote_dir}")
-        
+
     except Exception as e:
         print(f"❌ 上传过程出错: {e}")
         raise
     finally:
         c.close()
+        for conn in extra_conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
         print("🔒 SSH连接已关闭")
 
 
+# 进程内执行的脚本缓存：键为(解析后路径, mtime_ns)，文件一变缓存即失效
+_SCRIPT_CACHE: Dict[Tuple[str, int], Any] = {}
+
+
+def _run_script_inprocess(script: Path, args: List[str]) -> Tuple[int, str, str]:
+    """在当前进程内执行脚本，省去每次约数十毫秒的解释器启动开销"""
+    import importlib.util
+    import io
+    import contextlib
+
+    cache_key = (str(script), script.stat().st_mtime_ns)
+    spec_module = _SCRIPT_CACHE.get(cache_key)
+    if spec_module is None:
+        spec = importlib.util.spec_from_file_location(f"_script_{script.stem}", script)
+        spec_module = (spec, importlib.util.module_from_spec(spec))
+        _SCRIPT_CACHE[cache_key] = spec_module
+    spec, module = spec_module
+
+    stdout_buf, stderr_buf = io.StringIO(), io.StringIO()
+    old_argv = sys.argv
+    sys.argv = [str(script), *map(str, args)]
+    try:
+        with contextlib.redirect_stdout(stdout_buf), contextlib.redirect_stderr(stderr_buf):
+            spec.loader.exec_module(module)
+        return 0, stdout_buf.getvalue(), stderr_buf.getvalue()
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        return code, stdout_buf.getvalue(), stderr_buf.getvalue()
+    except Exception as e:
+        return 1, stdout_buf.getvalue(), stderr_buf.getvalue() + str(e)
+    finally:
+        sys.argv = old_argv
+
+
 def run_python_script(
     script_path: str,
     args: Optional[List[str]] = None,
     capture_output: bool = True,
     timeout: Optional[int] = None,
+    inprocess: bool = False,
 ) -> Tuple[int, str, str]:
     """
-    在一个独立的 Python 进程中执行脚本。
+    执行 Python 脚本，默认在独立进程中运行。
 
     :param script_path: 要执行的 Python 脚本路径 (.py)
     :param args: 传递给脚本的参数列表
     :param capture_output: 是否捕获 stdout/stderr
     :param timeout: 超时时间（秒）
+    :param inprocess: 为True时在当前进程内import执行（免去解释器启动开销，
+        适合频繁调用的可信脚本；不支持timeout，异常不会隔离到子进程）
     :return: (exit_code, stdout, stderr)
     """
     if args is None:
@@ -196,6 +311,9 @@ def run_python_script(
     if not script.exists():
         raise FileNotFoundError(f"Script not found: {script}")
 
+    if inprocess:
+        return _run_script_inprocess(script, args)
+
     # 构造执行命令
     cmd = [sys.executable, str(script), *map(str, args)]
     print(f"▶ Running: {' '.join(cmd)}")
@@ -219,6 +337,39 @@ def run_python_script(
 
 # ==================== 异步HTTP接口调用工具 ====================
 
+# 模块级共享AsyncClient：连接与TLS握手只做一次，后续请求复用keep-alive连接
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """惰性创建共享的AsyncClient（带连接池），每次调用可用timeout=覆盖超时"""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            # HTTP/2：并发请求在同一条TCP+TLS连接上多路复用，
+            # 对端不支持时httpx自动协商回落到HTTP/1.1
+            http2=True,
+            # 公共请求头注册一次，调用方只传请求特有的头（自动合并）
+            headers={
+                "User-Agent": "piano-agent/1.1",
+                "Accept": "application/json",
+                # 大响应体压缩传输（httpx在C层透明解压），带宽常是接口瓶颈
+                "Accept-Encoding": "br, gzip",
+            },
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+        )
+    return _CLIENT
+
+
+async def close_http_client():
+    """关闭共享的AsyncClient（应在服务shutdown时调用）"""
+    global _CLIENT
+    if _CLIENT is not None and not _CLIENT.is_closed:
+        await _CLIENT.aclose()
+    _CLIENT = None
+
+
 async def async_http_request(
     url: str,
     method: str = "GET",
@@ -260,44 +411,55 @@ async def async_http_request(
             json_data={"name": "John", "age": 30}
         )
     """
-    async with httpx.AsyncClient(timeout=timeout) as client:
+    client = _get_client()
+    try:
+        # 请求体预先用orjson序列化，避免httpx内部走stdlib json
+        request_kwargs: Dict[str, Any] = {"json": json_data}
+        if json_data is not None and orjson is not None:
+            headers = {"Content-Type": "application/json", **(headers or {})}
+            request_kwargs = {"content": orjson.dumps(json_data)}
+
+        response = await client.request(
+            method=method.upper(),
+            url=url,
+            data=data,
+            params=params,
+            headers=headers,
+            timeout=timeout,
+            **request_kwargs,
+        )
+
+        # 尝试解析JSON，失败则返回文本
+        # orjson直接吃bytes，省去response.json()里的utf-8预解码
         try:
-            response = await client.request(
-                method=method.upper(),
-                url=url,
-                json=json_data,
-                data=data,
-                params=params,
-                headers=headers,
-            )
-            
-            # 尝试解析JSON，失败则返回文本
-            try:
+            if orjson is not None:
+                body = orjson.loads(response.content)
+            else:
                 body = response.json()
-            except Exception:
-                body = response.text
-            
-            return {
-                "status_code": response.status_code,
-                "headers": dict(response.headers),
-                "body": body,
-                "success": 200 <= response.status_code < 300
-            }
-            
-        except httpx.TimeoutException as e:
-            return {
-                "status_code": 0,
-                "headers": {},
-                "body": f"Request timeout: {str(e)}",
-                "success": False
-            }
-        except Exception as e:
-            return {
-                "status_code": 0,
-                "headers": {},
-                "body": f"Request error: {str(e)}",
-                "success": False
-            }
+        except Exception:
+            body = response.text
+
+        return {
+            "status_code": response.status_code,
+            "headers": dict(response.headers),
+            "body": body,
+            "success": 200 <= response.status_code < 300
+        }
+
+    except httpx.TimeoutException as e:
+        return {
+            "status_code": 0,
+            "headers": {},
+            "body": f"Request timeout: {str(e)}",
+            "success": False
+        }
+    except Exception as e:
+        return {
+            "status_code": 0,
+            "headers": {},
+            "body": f"Request error: {str(e)}",
+            "success": False
+        }
 
 
 async def async_get(url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
@@ -380,6 +542,57 @@ async def async_delete(url: str, **kwargs) -> Dict[str, Any]:
     return await async_http_request(url, method="DELETE", **kwargs)
 
 
+class SseDecoder:
+    """
+    增量SSE帧解码器
+
+    feed()吃任意大小的原始字节块，返回其中所有完整帧的data载荷
+    （bytes）。帧边界（空行）用C级bytes.find定位，兼容\\n\\n和
+    \\r\\n\\r\\n两种分隔；不完整的尾帧留在内部缓冲等下一块。
+    多行data字段按SSE规范以\\n拼接。
+    """
+
+    # 前缀常量提升为类属性，热循环里不再逐行构造bytes字面量
+    _DATA = b'data: '
+    _DATA_LEN = 6
+    _DATA_BARE = b'data:'
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        buf = self._buf
+        buf += chunk
+        payloads = []
+        while True:
+            idx = buf.find(b"\n\n")
+            r_idx = buf.find(b"\r\n\r\n")
+            if r_idx != -1 and (idx == -1 or r_idx < idx):
+                idx, sep_len = r_idx, 4
+            elif idx != -1:
+                sep_len = 2
+            else:
+                break
+
+            frame = bytes(buf[:idx])
+            del buf[:idx + sep_len]
+
+            # 常见情况快路径：单行"data: ..."帧直接切片，
+            # 跳过splitlines+列表+join三重分配
+            if frame.startswith(self._DATA) and b"\n" not in frame:
+                payloads.append(frame[self._DATA_LEN:])
+                continue
+
+            data_lines = [
+                line[self._DATA_LEN:] if line.startswith(self._DATA) else line[5:]
+                for line in frame.splitlines()
+                if line.startswith(self._DATA_BARE)
+            ]
+            if data_lines:
+                payloads.append(b"\n".join(data_lines))
+        return payloads
+
+
 async def async_stream_request(
     url: str,
     method: str = "GET",
@@ -406,16 +619,17 @@ async def async_stream_request(
         async for line in async_stream_request("https://api.example.com/stream"):
             print(line)
     """
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        async with client.stream(
-            method=method.upper(),
-            url=url,
-            json=json_data,
-            params=params,
-            headers=headers,
-        ) as response:
-            async for line in response.aiter_lines():
-                yield line
+    client = _get_client()
+    async with client.stream(
+        method=method.upper(),
+        url=url,
+        json=json_data,
+        params=params,
+        headers=headers,
+        timeout=timeout,
+    ) as response:
+        async for line in response.aiter_lines():
+            yield line
 
 
 async def async_stream_sse(
@@ -444,26 +658,36 @@ async def async_stream_sse(
         async for data in async_stream_sse("https://api.example.com/events"):
             print(f"收到事件: {data}")
     """
-    async for line in async_stream_request(url, method, json_data, params, headers, timeout):
-        # SSE格式：data: {...}
-        if line.startswith('data: '):
-            yield line[6:]  # 去掉 "data: " 前缀
+    # 原始字节块直接喂给帧解码器，不走aiter_lines的逐行Python扫描
+    decoder = SseDecoder()
+    client = _get_client()
+    async with client.stream(
+        method=method.upper(),
+        url=url,
+        json=json_data,
+        params=params,
+        headers=headers,
+        timeout=timeout,
+    ) as response:
+        async for chunk in response.aiter_raw():
+            for payload in decoder.feed(chunk):
+                yield payload.decode('utf-8')
 
 
 async def async_download_file(
     url: str,
     save_path: str,
-    chunk_size: int = 8192,
+    chunk_size: int = 1 << 20,
     timeout: float = 300.0,
     progress_callback: Optional[callable] = None
 ) -> bool:
     """
     异步下载文件
-    
+
     参数:
         url: 文件URL
         save_path: 保存路径
-        chunk_size: 每次读取的字节数
+        chunk_size: 每次读取的字节数（默认1MiB，大块读写减少系统调用次数）
         timeout: 超时时间（秒）
         progress_callback: 进度回调函数 callback(downloaded_bytes, total_bytes)
     
@@ -481,26 +705,33 @@ async def async_download_file(
         )
     """
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            async with client.stream("GET", url) as response:
-                response.raise_for_status()
-                
-                total_bytes = int(response.headers.get('content-length', 0))
-                downloaded_bytes = 0
-                
-                # 确保目录存在
-                os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
-                
-                with open(save_path, 'wb') as f:
-                    async for chunk in response.aiter_bytes(chunk_size=chunk_size):
-                        f.write(chunk)
-                        downloaded_bytes += len(chunk)
-                        
-                        if progress_callback and total_bytes:
+        client = _get_client()
+        async with client.stream("GET", url, timeout=timeout) as response:
+            response.raise_for_status()
+
+            total_bytes = int(response.headers.get('content-length', 0))
+            downloaded_bytes = 0
+
+            # 确保目录存在
+            os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+
+            # aiofiles把写盘放到线程池，事件循环不会被阻塞式f.write卡住
+            last_marker = -1
+            async with aiofiles.open(save_path, 'wb') as f:
+                async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+                    await f.write(chunk)
+                    downloaded_bytes += len(chunk)
+
+                    # 进度回调按1MiB节流：大文件不再每块都进一次Python回调
+                    if progress_callback and total_bytes:
+                        marker = downloaded_bytes >> 20
+                        if marker != last_marker or downloaded_bytes >= total_bytes:
+                            last_marker = marker
                             progress_callback(downloaded_bytes, total_bytes)
-                
-                return True
-                
+
+            return True
+
+
     except Exception as e:
         print(f"❌ 下载失败: {e}")
         return False
@@ -5,92 +5,118 @@ API测试脚本
 import asyncio
 import json
 
+try:
+    # libuv事件循环：并发探测的小请求在C层调度，少走Python帧
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 
 async def test_api():
     """测试API端点"""
     try:
-        import httpx
+        from http_session import get_session
     except ImportError:
-        print("请先安装 httpx: pip install httpx")
+        print("请先安装 aiohttp: pip install aiohttp")
         return
-    
+
     base_url = "http://localhost:8000"
-    
+
     print("=" * 60)
     print("🧪 测试 Termitech Auto-Piano API")
     print("=" * 60)
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
+
+    # 四个只读探测互相独立，各自封装成协程后用gather并发发出，
+    # 总耗时从各RTT之和降到最大RTT
+    async def probe_health(client):
         # 1. 健康检查
-        print("\n✅ 1. 测试健康检查...")
-        response = await client.get(f"{base_url}/health")
-        print(f"   状态码: {response.status_code}")
-        print(f"   响应: {response.json()}")
-        
+        async with client.get(f"{base_url}/health") as response:
+            return ["\n✅ 1. 测试健康检查...",
+                    f"   状态码: {response.status}",
+                    f"   响应: {await response.json()}"]
+
+    async def probe_scores(client):
         # 2. 获取曲库列表
-        print("\n✅ 2. 测试获取曲库列表...")
-        response = await client.get(f"{base_url}/scores")
-        print(f"   状态码: {response.status_code}")
-        scores = response.json()
-        print(f"   曲目数量: {len(scores)}")
-        if scores:
-            print(f"   第一首曲目: {scores[0]['name']}")
-        
+        async with client.get(f"{base_url}/scores") as response:
+            scores = await response.json()
+            lines = ["\n✅ 2. 测试获取曲库列表...",
+                     f"   状态码: {response.status}",
+                     f"   曲目数量: {len(scores)}"]
+            if scores:
+                lines.append(f"   第一首曲目: {scores[0]['name']}")
+            return lines
+
+    async def probe_search(client):
         # 3. 搜索曲目
-        print("\n✅ 3. 测试搜索曲目...")
-        response = await client.get(f"{base_url}/scores?q=贝多芬")
-        print(f"   状态码: {response.status_code}")
-        print(f"   搜索结果: {len(response.json())} 首")
-        
-        # 4. 创建演奏会话
-        print("\n✅ 4. 测试创建演奏会话...")
-        response = await client.post(
-            f"{base_url}/performances",
-            json={
-                "pieceId": "piece_1",
-                "tempo": 120,
-                "hands": "both"
-            }
-        )
-        print(f"   状态码: {response.status_code}")
-        performance = response.json()
-        performance_id = performance["id"]
-        print(f"   演奏ID: {performance_id}")
-        print(f"   SSE URL: {performance['sseUrl']}")
-        
-        # 5. 获取演奏状态
-        print("\n✅ 5. 测试获取演奏状态...")
-        response = await client.get(f"{base_url}/performances/{performance_id}")
-        print(f"   状态码: {response.status_code}")
-        print(f"   演奏状态: {response.json()['status']}")
-        
-        # 6. 测试下载音乐
-        print("\n✅ 6. 测试下载音乐...")
-        response = await client.post(
-            f"{base_url}/download/music",
-            json={
-                "music_id": 1,
-                "music_name": "测试曲目"
-            }
-        )
-        print(f"   状态码: {response.status_code}")
-        print(f"   响应: {response.json()}")
-        
-        # 7. 测试分析音乐
-        print("\n✅ 7. 测试分析音乐...")
-        response = await client.post(
-            f"{base_url}/analyze_music",
-            json={"music_id": 1}
-        )
-        print(f"   状态码: {response.status_code}")
-        print(f"   乐谱路径: {response.json()}")
-        
+        async with client.get(f"{base_url}/scores", params={"q": "贝多芬"}) as response:
+            return ["\n✅ 3. 测试搜索曲目...",
+                    f"   状态码: {response.status}",
+                    f"   搜索结果: {len(await response.json())} 首"]
+
+    async def probe_history(client):
         # 8. 获取历史记录
-        print("\n✅ 8. 测试获取历史记录...")
-        response = await client.get(f"{base_url}/history?limit=10")
-        print(f"   状态码: {response.status_code}")
-        print(f"   历史记录数: {len(response.json())}")
-        
+        async with client.get(f"{base_url}/history", params={"limit": 10}) as response:
+            return ["\n✅ 8. 测试获取历史记录...",
+                    f"   状态码: {response.status}",
+                    f"   历史记录数: {len(await response.json())}"]
+
+    # 共享会话不在本函数关闭：keep-alive连接留给其他测试复用
+    client = get_session()
+
+    health, scores, search, history = await asyncio.gather(
+        probe_health(client), probe_scores(client),
+        probe_search(client), probe_history(client),
+    )
+    for lines in (health, scores, search):
+        print("\n".join(lines))
+
+    # 4. 创建演奏会话
+    print("\n✅ 4. 测试创建演奏会话...")
+    async with client.post(
+        f"{base_url}/performances",
+        json={
+            "pieceId": "piece_1",
+            "tempo": 120,
+            "hands": "both"
+        }
+    ) as response:
+        print(f"   状态码: {response.status}")
+        performance = await response.json()
+    performance_id = performance["id"]
+    print(f"   演奏ID: {performance_id}")
+    print(f"   SSE URL: {performance['sseUrl']}")
+
+    # 5. 获取演奏状态
+    print("\n✅ 5. 测试获取演奏状态...")
+    async with client.get(f"{base_url}/performances/{performance_id}") as response:
+        print(f"   状态码: {response.status}")
+        print(f"   演奏状态: {(await response.json())['status']}")
+
+    # 6. 测试下载音乐
+    print("\n✅ 6. 测试下载音乐...")
+    async with client.post(
+        f"{base_url}/download/music",
+        json={
+            "music_id": 1,
+            "music_name": "测试曲目"
+        }
+    ) as response:
+        print(f"   状态码: {response.status}")
+        print(f"   响应: {await response.json()}")
+
+    # 7. 测试分析音乐
+    print("\n✅ 7. 测试分析音乐...")
+    async with client.post(
+        f"{base_url}/analyze_music",
+        json={"music_id": 1}
+    ) as response:
+        print(f"   状态码: {response.status}")
+        print(f"   乐谱路径: {await response.json()}")
+
+    # 8. 历史记录已在最初的gather批次里取回，这里按编号顺序输出
+    print("\n".join(history))
+
     print("\n" + "=" * 60)
     print("✨ 测试完成！")
     print("=" * 60)
@@ -106,9 +132,13 @@ def test_sse():
     
     print("\n🌊 测试SSE流...")
     print("提示: 按 Ctrl+C 停止测试\n")
-    
+
     import sys
-    
+
+    # 行缓冲一次配置好，C运行时在换行处自动flush，
+    # 不必每条SSE行手动flush（每次flush都是一次write系统调用）
+    sys.stdout.reconfigure(line_buffering=True)
+
     base_url = "http://localhost:8000"
     
     # 首先创建一个演奏会话
@@ -126,7 +156,6 @@ def test_sse():
             for line in response.iter_lines():
                 if line:
                     print(line)
-                    sys.stdout.flush()
     except KeyboardInterrupt:
         print("\n\n测试中断")
 
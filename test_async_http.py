@@ -3,6 +3,13 @@
 演示如何使用 src.utils 中的异步HTTP函数
 """
 import asyncio
+
+try:
+    # libuv事件循环：C层调度回调，I/O密集的测试省掉大量Python帧开销
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 from src.utils import (
     async_get,
     async_post,
@@ -13,42 +20,60 @@ from src.utils import (
 )
 
 
+async def batched_requests(specs, batch=4):
+    """
+    把相互独立的请求按批并发派发
+
+    specs为 (协程函数, args, kwargs) 列表；信号量限制同时在途的
+    请求数，结果按specs原顺序返回（gather保序）。
+    """
+    sem = asyncio.Semaphore(batch)
+
+    async def _dispatch(func, args, kwargs):
+        async with sem:
+            return await func(*args, **kwargs)
+
+    return await asyncio.gather(
+        *(_dispatch(func, args, kwargs) for func, args, kwargs in specs)
+    )
+
+
 async def test_basic_requests():
     """测试基本HTTP请求"""
-    print("=" * 80)
-    print("测试基本HTTP请求")
-    print("=" * 80)
-    
+    # 报告先攒在列表里、最后一次性print——并发跑多个测试时
+    # 各自的输出不会交错
+    report = ["=" * 80, "测试基本HTTP请求", "=" * 80]
+
+    # 四个探测互不依赖，走同一个批量派发器而不是四次串行await
+    get_r, post_r, put_r, delete_r = await batched_requests([
+        (async_get, ("https://httpbin.org/get",), {"params": {"test": "value"}}),
+        (async_post, ("https://httpbin.org/post",), {"json_data": {"name": "John", "age": 30}}),
+        (async_put, ("https://httpbin.org/put",), {"json_data": {"id": 1, "name": "Updated"}}),
+        (async_delete, ("https://httpbin.org/delete",), {}),
+    ])
+
     # GET请求示例
-    print("\n1. GET请求:")
-    result = await async_get("https://httpbin.org/get", params={"test": "value"})
-    print(f"   状态码: {result['status_code']}")
-    print(f"   成功: {result['success']}")
-    print(f"   响应: {result['body']}")
-    
+    report.append("\n1. GET请求:")
+    report.append(f"   状态码: {get_r['status_code']}")
+    report.append(f"   成功: {get_r['success']}")
+    report.append(f"   响应: {get_r['body']}")
+
     # POST请求示例
-    print("\n2. POST请求:")
-    result = await async_post(
-        "https://httpbin.org/post",
-        json_data={"name": "John", "age": 30}
-    )
-    print(f"   状态码: {result['status_code']}")
-    print(f"   成功: {result['success']}")
-    
+    report.append("\n2. POST请求:")
+    report.append(f"   状态码: {post_r['status_code']}")
+    report.append(f"   成功: {post_r['success']}")
+
     # PUT请求示例
-    print("\n3. PUT请求:")
-    result = await async_put(
-        "https://httpbin.org/put",
-        json_data={"id": 1, "name": "Updated"}
-    )
-    print(f"   状态码: {result['status_code']}")
-    print(f"   成功: {result['success']}")
-    
+    report.append("\n3. PUT请求:")
+    report.append(f"   状态码: {put_r['status_code']}")
+    report.append(f"   成功: {put_r['success']}")
+
     # DELETE请求示例
-    print("\n4. DELETE请求:")
-    result = await async_delete("https://httpbin.org/delete")
-    print(f"   状态码: {result['status_code']}")
-    print(f"   成功: {result['success']}")
+    report.append("\n4. DELETE请求:")
+    report.append(f"   状态码: {delete_r['status_code']}")
+    report.append(f"   成功: {delete_r['success']}")
+
+    print("\n".join(report))
 
 
 async def test_stream_sse():
@@ -107,55 +132,55 @@ async def test_performance_stream():
 
 async def test_download_file():
     """测试文件下载"""
-    print("\n" + "=" * 80)
-    print("测试文件下载")
-    print("=" * 80)
-    
+    report = ["\n" + "=" * 80, "测试文件下载", "=" * 80]
+
     def progress(downloaded, total):
-        """下载进度回调"""
+        """下载进度回调（进并发安全的报告缓冲，不直接写终端）"""
         percent = (downloaded / total * 100) if total > 0 else 0
-        print(f"\r下载进度: {downloaded}/{total} 字节 ({percent:.1f}%)", end="")
-    
+        report.append(f"下载进度: {downloaded}/{total} 字节 ({percent:.1f}%)")
+
     # 下载一个小文件测试
     url = "https://httpbin.org/image/png"
     save_path = "/tmp/test_image.png"
-    
-    print(f"\n下载文件:")
-    print(f"  URL: {url}")
-    print(f"  保存到: {save_path}")
-    
+
+    report.append(f"\n下载文件:")
+    report.append(f"  URL: {url}")
+    report.append(f"  保存到: {save_path}")
+
     success = await async_download_file(url, save_path, progress_callback=progress)
-    
+
     if success:
-        print(f"\n✅ 下载成功: {save_path}")
+        report.append(f"✅ 下载成功: {save_path}")
     else:
-        print("\n❌ 下载失败")
+        report.append("❌ 下载失败")
+
+    print("\n".join(report))
 
 
 async def test_parallel_requests():
     """测试并行请求"""
-    print("\n" + "=" * 80)
-    print("测试并行HTTP请求")
-    print("=" * 80)
-    
+    report = ["\n" + "=" * 80, "测试并行HTTP请求", "=" * 80]
+
     # 创建多个并行请求
     tasks = [
         async_get("https://httpbin.org/delay/1"),
         async_get("https://httpbin.org/delay/1"),
         async_get("https://httpbin.org/delay/1"),
     ]
-    
-    print("\n发起3个并行请求（每个延迟1秒）...")
+
+    report.append("\n发起3个并行请求（每个延迟1秒）...")
     import time
     start = time.time()
-    
+
     # 并行执行所有请求
     results = await asyncio.gather(*tasks)
-    
+
     elapsed = time.time() - start
-    print(f"✅ 完成！耗时: {elapsed:.2f}秒")
-    print(f"   如果是串行执行应该需要3秒，并行只需要1秒左右")
-    print(f"   成功请求数: {sum(1 for r in results if r['success'])}/{len(results)}")
+    report.append(f"✅ 完成！耗时: {elapsed:.2f}秒")
+    report.append(f"   如果是串行执行应该需要3秒，并行只需要1秒左右")
+    report.append(f"   成功请求数: {sum(1 for r in results if r['success'])}/{len(results)}")
+
+    print("\n".join(report))
 
 
 async def main():
@@ -186,10 +211,14 @@ async def main():
     elif choice == "5":
         await test_parallel_requests()
     elif choice == "6":
-        await test_basic_requests()
+        # 三个测试互不依赖，并发跑完：总耗时取决于最慢的一个
+        # 而不是三者之和；各自的报告在结束时整块输出，互不交错
         # await test_stream_sse()  # 需要手动停止
-        await test_download_file()
-        await test_parallel_requests()
+        await asyncio.gather(
+            test_basic_requests(),
+            test_download_file(),
+            test_parallel_requests(),
+        )
     else:
         print("❌ 无效选项")
 
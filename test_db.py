@@ -11,9 +11,12 @@ print(f"✅ 数据库连接测试: {'成功' if result else '失败'}")
 # 不指定ID，让系统自动生成
 print(f"\n📝 插入测试记录（自动生成ID）")
 
+# 整个测试共用一个Session、一次事务：
+# 连接检出和COMMIT往返只发生一次，而不是每个代码块各付一次
 with db_manager.get_session() as session:
     record = PerformanceHistoryDB.create(
         session,
+        commit=False,
         # 不指定 id，会自动生成
         piece_id="piece_1",
         piece_name="测试曲目",
@@ -23,11 +26,11 @@ with db_manager.get_session() as session:
         success=True
     )
     print(f"✅ 记录创建成功，自动生成的ID: {record.id}")
+    session.commit()
 
-# 查询记录（保存刚创建的ID）
-created_id = record.id
-print(f"\n📊 查询刚创建的记录:")
-with db_manager.get_session() as session:
+    # 查询记录（保存刚创建的ID）
+    created_id = record.id
+    print(f"\n📊 查询刚创建的记录:")
     record = PerformanceHistoryDB.get_by_id(session, created_id)
     if record:
         print(f"   - ID: {record.id}")
@@ -36,16 +39,14 @@ with db_manager.get_session() as session:
         print(f"   - 状态: {record.status}")
         print(f"   - 成功: {record.success}")
 
-# 获取所有记录
-print(f"\n📋 所有记录:")
-with db_manager.get_session() as session:
+    # 获取所有记录
+    print(f"\n📋 所有记录:")
     records = PerformanceHistoryDB.get_all(session, limit=10)
     for r in records:
         print(f"   - {r.piece_name} ({r.composer}) - {r.status}")
 
-# 获取统计信息
-print(f"\n📈 数据库统计:")
-with db_manager.get_session() as session:
+    # 获取统计信息
+    print(f"\n📈 数据库统计:")
     stats = PerformanceHistoryDB.get_statistics(session)
     print(f"   - 总记录数: {stats['total_performances']}")
     print(f"   - 总时长: {stats['total_duration_sec']} 秒")
@@ -1,10 +1,47 @@
+import asyncio
+import json
+
 from src.graph.agent import agent
 from src.utils import generate_session_id
-import json
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+_DONE = object()
+
+
+async def main():
+    """读取与解析/打印流水线化：下一个chunk的生成和当前chunk的消费重叠"""
+    # 有界队列提供背压：打印跟不上时生产侧会被put阻塞，内存不失控
+    queue = asyncio.Queue(maxsize=16)
+    loop = asyncio.get_running_loop()
+
+    def produce():
+        # 同步的agent.stream放到线程里跑，主事件循环只管消费
+        # stream_mode="custom" 时，chunk 是通过 writer() 发送的自定义数据（JSON字符串）
+        try:
+            for chunk in agent.stream(
+                {"messages": [], "context": {"session_id": generate_session_id()}},
+                stream_mode="custom",
+            ):
+                asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+        finally:
+            # stream抛异常也要把结束标记送进队列，否则消费循环永远
+            # 等不到_DONE；异常本身经await producer重新抛出
+            asyncio.run_coroutine_threadsafe(queue.put(_DONE), loop).result()
+
+    producer = asyncio.create_task(asyncio.to_thread(produce))
+    while True:
+        chunk = await queue.get()
+        if chunk is _DONE:
+            break
+        # chunk 是 JSON 字符串，需要解析
+        message_data = _loads(chunk)
+        print(f"📩 收到消息: {message_data['content']}")
+    await producer
 
 
-# stream_mode="custom" 时，chunk 是通过 writer() 发送的自定义数据（JSON字符串）
-for chunk in agent.stream({"messages": [], "context": {"session_id": generate_session_id()}}, stream_mode="custom"):
-    # chunk 是 JSON 字符串，需要解析
-    message_data = json.loads(chunk)
-    print(f"📩 收到消息: {message_data['content']}")
\ No newline at end of file
+asyncio.run(main())
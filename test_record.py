@@ -2,107 +2,210 @@
 测试录音流式接口
 用于接收 /record 端点的 SSE 流式输出
 """
-import requests
+import asyncio
+import functools
+import aiohttp
 import json
+import sys
 import time
-from datetime import datetime
+from types import MappingProxyType
+
+try:
+    # libuv事件循环：SSE这类大量小块读取的负载收益最明显
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+from http_session import get_session
+from src.utils import SseDecoder
+
+try:
+    # orjson直接吃bytes（免一次utf-8预解码），解析比stdlib快数倍
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+# 统计模式里单独计数的消息类型，其余归入other
+_COUNTED_TYPES = frozenset(('note_on', 'note_off', 'control_change'))
+
+_TS_CACHE = (0, "")
+
+
+def _timestamp():
+    """毫秒级时间串：秒部分的strftime结果按秒缓存，毫秒走整数取模
+
+    datetime.now().strftime("%H:%M:%S.%f")每次都格式化微秒，
+    在每秒数百条消息的流上是可观的CPU开销。
+    """
+    global _TS_CACHE
+    ns = time.time_ns()
+    sec = ns // 1_000_000_000
+    cached_sec, cached_str = _TS_CACHE
+    if sec != cached_sec:
+        cached_str = time.strftime("%H:%M:%S", time.localtime(sec))
+        _TS_CACHE = (sec, cached_str)
+    return f"{cached_str}.{(ns // 1_000_000) % 1000:03d}"
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_frame(payload: bytes):
+    """带缓存的帧解析：相同字节的帧只解析一次
+
+    钢琴流里note_off/control_change常在短窗口内逐字节重复
+    （同一琴键松开、同一CC值重发），命中时省掉整次JSON解析。
+    返回只读视图——缓存对象跨事件共享，调用方不得就地修改，
+    因此只在不改写事件的统计模式下启用。
+    """
+    data = _loads(payload)
+    return MappingProxyType(data) if type(data) is dict else data
+
+
+async def consume_sse(url, on_event, timeout=60, cache_frames=False):
+    """
+    通用SSE消费器：aiohttp按块读取，SseDecoder按空行切帧
+
+    比requests.iter_lines少一层逐行Python扫描，且不会在recv上
+    持着GIL阻塞。服务端每帧发的是一个消息数组（攒批降低语法开销），
+    这里拆开逐条派发：on_event(data: dict) 对每条消息调用一次；
+    传入协程函数（如queue.put）时逐条await，下游的背压会顺势
+    传导到读取端。cache_frames=True时重复帧走解析缓存（回调
+    拿到的是只读视图，勿修改）。
+    """
+    awaitable = asyncio.iscoroutinefunction(on_event)
+    parse = _parse_frame if cache_frames else _loads
+    # 共享会话：连接池跨测试复用，超时按本次请求单独指定
+    session = get_session()
+    client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+    async with session.get(url, timeout=client_timeout) as response:
+        if response.status != 200:
+            print(f"❌ 请求失败: {response.status}")
+            print(f"响应内容: {await response.text()}")
+            return
+
+        print("✅ 连接成功，开始接收数据...\n")
+        print("-" * 80)
+
+        decoder = SseDecoder()
+        async for chunk in response.content.iter_any():
+            for payload in decoder.feed(chunk):
+                try:
+                    data = parse(payload)
+                except ValueError as e:
+                    print(f"⚠️  JSON解析错误: {e}")
+                    print(f"原始数据: {payload!r}")
+                    continue
+                # 数组帧拆成单条消息派发；单对象帧（旧格式/其他
+                # 端点）原样透传
+                events = data if type(data) is list else (data,)
+                if awaitable:
+                    for event in events:
+                        await on_event(event)
+                else:
+                    for event in events:
+                        on_event(event)
+
+
+_DONE = object()
 
 
 def test_record_stream_simple():
     """
-    简单方式：使用 requests 库接收流式数据
+    简单方式：异步接收流式数据
+
+    读取/解析和打印拆成两级流水线：终端跟不上时有界队列先吸收
+    突发，满了之后背压沿queue.put传回读取端，TCP接收窗口自然
+    收紧，内存不会失控。
     """
     print("🎹 开始接收MIDI录音流式数据...\n")
-    
+
     # 配置接口地址
     url = "http://localhost:8123/record"
-    
+
+    received = 0
+
+    async def pipeline():
+        parsed = asyncio.Queue(maxsize=64)
+
+        async def reader():
+            try:
+                # parsed.put是协程函数，consume_sse会逐条await——
+                # 队列满即阻塞读取，这就是背压
+                await consume_sse(url, parsed.put)
+            finally:
+                await parsed.put(_DONE)
+
+        async def printer():
+            nonlocal received
+            while True:
+                data = await parsed.get()
+                if data is _DONE:
+                    return
+                received += 1
+                # dict的repr直接输出，不再indent=2重新编码一遍JSON
+                print(f"[{_timestamp()}] 收到消息:")
+                print(data)
+                print("-" * 80)
+
+        await asyncio.gather(reader(), printer())
+
     try:
-        # 发起流式请求
-        with requests.get(url, stream=True, timeout=60) as response:
-            if response.status_code != 200:
-                print(f"❌ 请求失败: {response.status_code}")
-                print(f"响应内容: {response.text}")
-                return
-            
-            print("✅ 连接成功，开始接收数据...\n")
-            print("-" * 80)
-            
-            # 逐行读取流式数据
-            for line in response.iter_lines():
-                if line:
-                    # 解码字节流
-                    line_str = line.decode('utf-8')
-                    
-                    # SSE 格式：data: {...}
-                    if line_str.startswith('data: '):
-                        data_str = line_str[6:]  # 去掉 "data: " 前缀
-                        
-                        try:
-                            # 解析 JSON 数据
-                            data = json.loads(data_str)
-                            
-                            # 格式化输出
-                            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                            print(f"[{timestamp}] 收到消息:")
-                            print(json.dumps(data, indent=2, ensure_ascii=False))
-                            print("-" * 80)
-                            
-                        except json.JSONDecodeError as e:
-                            print(f"⚠️  JSON解析错误: {e}")
-                            print(f"原始数据: {data_str}")
-                    
-    except requests.exceptions.ConnectionError:
+        asyncio.run(pipeline())
+    except aiohttp.ClientConnectionError:
         print("❌ 连接失败: 无法连接到服务器")
         print("请确保服务器正在运行: python src/record/record_server.py")
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         print("❌ 请求超时")
     except KeyboardInterrupt:
-        print("\n\n👋 用户中断，停止接收")
+        # asyncio.run负责取消两级任务，这里只报收到的总数
+        print(f"\n\n👋 用户中断，停止接收（共收到 {received} 条消息）")
     except Exception as e:
         print(f"❌ 发生错误: {e}")
 
 
-def test_record_stream_with_sseclient():
+def test_record_stream_sync():
     """
-    使用 sseclient-py 库接收 SSE 数据（需要安装：pip install sseclient-py）
+    同步模式：httpx流式读取原始字节，SseDecoder切帧
+
+    替代原来的sseclient-py变体——requests在urllib3的read()里持着
+    GIL逐字节解析，httpx在socket I/O期间释放GIL，且字节级解码器
+    不需要额外依赖。
     """
-    try:
-        import sseclient
-    except ImportError:
-        print("❌ 未安装 sseclient-py 库")
-        print("请运行: pip install sseclient-py")
-        return
-    
-    print("🎹 使用 SSE 客户端接收MIDI录音流式数据...\n")
-    
+    import httpx
+
+    print("🎹 使用同步客户端接收MIDI录音流式数据...\n")
+
     url = "http://localhost:8123/record"
-    
+
     try:
-        # 创建 SSE 客户端
-        response = requests.get(url, stream=True, timeout=60)
-        client = sseclient.SSEClient(response)
-        
-        print("✅ 连接成功，开始接收数据...\n")
-        print("-" * 80)
-        
-        # 接收事件流
-        for event in client.events():
-            try:
-                # 解析 JSON 数据
-                data = json.loads(event.data)
-                
-                # 格式化输出
-                timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                print(f"[{timestamp}] 收到MIDI事件:")
-                print(json.dumps(data, indent=2, ensure_ascii=False))
+        decoder = SseDecoder()
+        # http2=True：对HTTPS端点走ALPN协商，明文HTTP自动回退h11
+        with httpx.Client(http2=True, timeout=60) as client:
+            with client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    print(f"❌ 请求失败: {response.status_code}")
+                    return
+
+                print("✅ 连接成功，开始接收数据...\n")
                 print("-" * 80)
-                
-            except json.JSONDecodeError as e:
-                print(f"⚠️  JSON解析错误: {e}")
-                print(f"原始数据: {event.data}")
-                
-    except requests.exceptions.ConnectionError:
+
+                for chunk in response.iter_raw(8192):
+                    for payload in decoder.feed(chunk):
+                        try:
+                            data = _loads(payload)
+                            print(f"[{_timestamp()}] 收到MIDI事件:")
+                            print(data)
+                            print("-" * 80)
+                        except ValueError as e:
+                            print(f"⚠️  JSON解析错误: {e}")
+                            print(f"原始数据: {payload!r}")
+
+    except httpx.ConnectError:
         print("❌ 连接失败: 无法连接到服务器")
         print("请确保服务器正在运行: python src/record/record_server.py")
     except KeyboardInterrupt:
@@ -128,57 +231,54 @@ def test_record_stream_with_statistics():
         'start_time': time.time()
     }
     
+    # 每条消息先进缓冲，到统计边界一次性写出——
+    # 把每事件一次的write系统调用摊薄到每10条一次。
+    # 缓冲直接存bytes并写sys.stdout.buffer：绕过TextIOWrapper
+    # 每次write的UTF-8编码和换行翻译，每行只剩一次orjson序列化
+    out_buf = []
+
+    def on_event(data):
+        stats['total_messages'] += 1
+
+        # 统计消息类型：一次哈希探测代替最多四次字符串比较的elif链。
+        # 'type'在MIDI事件里几乎总是存在，in+[]双探测在常见路径上
+        # 比.get()省掉方法对象的创建和默认值参数打包
+        msg_type = data['type'] if 'type' in data else 'other'
+        stats[msg_type if msg_type in _COUNTED_TYPES else 'other'] += 1
+
+        # 显示消息（缓冲）。缓存命中时data是mappingproxy，
+        # orjson不认识它，序列化前浅拷贝回dict（小字典，C级拷贝）；
+        # 其余类型（dict、list等）orjson原样可序列化
+        body = _dumps(dict(data) if type(data) is MappingProxyType else data)
+        out_buf.append(
+            b"[" + _timestamp().encode('ascii') + b"] "
+            + msg_type.encode('utf-8') + b": " + body + b"\n"
+        )
+
+        # 每10条消息显示一次统计，同时刷出缓冲
+        if stats['total_messages'] % 10 == 0:
+            elapsed = time.time() - stats['start_time']
+            out_buf.append((
+                f"\n📊 统计 [运行时间: {elapsed:.1f}秒]:\n"
+                f"   总消息数: {stats['total_messages']}\n"
+                f"   Note On: {stats['note_on']}\n"
+                f"   Note Off: {stats['note_off']}\n"
+                f"   Control Change: {stats['control_change']}\n"
+                f"   其他: {stats['other']}\n"
+            ).encode('utf-8'))
+            out_buf.append(b"-" * 80 + b"\n")
+            sys.stdout.buffer.write(b"".join(out_buf))
+            sys.stdout.buffer.flush()
+            out_buf.clear()
+
     try:
-        with requests.get(url, stream=True, timeout=60) as response:
-            if response.status_code != 200:
-                print(f"❌ 请求失败: {response.status_code}")
-                print(f"响应内容: {response.text}")
-                return
-            
-            print("✅ 连接成功，开始接收数据...\n")
-            print("-" * 80)
-            
-            for line in response.iter_lines():
-                if line:
-                    line_str = line.decode('utf-8')
-                    
-                    if line_str.startswith('data: '):
-                        data_str = line_str[6:]
-                        
-                        try:
-                            data = json.loads(data_str)
-                            stats['total_messages'] += 1
-                            
-                            # 统计消息类型
-                            msg_type = data.get('type', 'unknown')
-                            if msg_type == 'note_on':
-                                stats['note_on'] += 1
-                            elif msg_type == 'note_off':
-                                stats['note_off'] += 1
-                            elif msg_type == 'control_change':
-                                stats['control_change'] += 1
-                            else:
-                                stats['other'] += 1
-                            
-                            # 显示消息
-                            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                            print(f"[{timestamp}] {msg_type}: {data}")
-                            
-                            # 每10条消息显示一次统计
-                            if stats['total_messages'] % 10 == 0:
-                                elapsed = time.time() - stats['start_time']
-                                print(f"\n📊 统计 [运行时间: {elapsed:.1f}秒]:")
-                                print(f"   总消息数: {stats['total_messages']}")
-                                print(f"   Note On: {stats['note_on']}")
-                                print(f"   Note Off: {stats['note_off']}")
-                                print(f"   Control Change: {stats['control_change']}")
-                                print(f"   其他: {stats['other']}")
-                                print("-" * 80)
-                            
-                        except json.JSONDecodeError as e:
-                            print(f"⚠️  JSON解析错误: {e}")
-                    
+        # 统计回调不修改事件，可以安全启用帧解析缓存
+        asyncio.run(consume_sse(url, on_event, cache_frames=True))
     except KeyboardInterrupt:
+        if out_buf:
+            sys.stdout.buffer.write(b"".join(out_buf))
+            sys.stdout.buffer.flush()
+            out_buf.clear()
         elapsed = time.time() - stats['start_time']
         print("\n\n" + "=" * 80)
         print("📊 最终统计:")
@@ -203,8 +303,8 @@ if __name__ == "__main__":
     print("🎹 MIDI 录音流式接口测试工具")
     print("=" * 80)
     print("\n选择测试模式:")
-    print("  1. 简单模式 (使用 requests)")
-    print("  2. SSE 客户端模式 (需要 sseclient-py)")
+    print("  1. 简单模式 (异步 aiohttp)")
+    print("  2. 同步模式 (httpx)")
     print("  3. 统计模式 (显示消息统计)")
     print("\n按 Ctrl+C 停止接收\n")
     
@@ -219,7 +319,7 @@ if __name__ == "__main__":
     if choice == "1":
         test_record_stream_simple()
     elif choice == "2":
-        test_record_stream_with_sseclient()
+        test_record_stream_sync()
     elif choice == "3":
         test_record_stream_with_statistics()
     else:
@@ -1,41 +1,53 @@
 """
 测试 SSE 流式返回
 """
-import requests
+import asyncio
+import aiohttp
 import json
 
+from http_session import get_session
+from src.utils import SseDecoder
+
+try:
+    # orjson直接吃bytes（免一次utf-8预解码），解析比stdlib快数倍
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 print("🚀 测试 SSE 流式返回")
 print("=" * 60)
 
 url = "http://localhost:8000/chat"
 
-try:
-    # 使用 stream=True 接收流式响应
-    response = requests.post(url, stream=True)
-    
-    print(f"📡 状态码: {response.status_code}")
-    print(f"📋 Content-Type: {response.headers.get('content-type')}")
-    print("\n📩 开始接收消息:\n")
-    
-    # 逐行读取 SSE 数据
-    for line in response.iter_lines():
-        if line:
-            line_str = line.decode('utf-8')
-            
-            # SSE 格式: data: {...}
-            if line_str.startswith('data: '):
-                data_json = line_str[6:]  # 移除 "data: " 前缀
+
+async def main():
+    # aiohttp按块异步读取，SseDecoder按空行切帧，
+    # 不像requests.iter_lines那样逐行在Python层扫描；
+    # 会话是跨测试共享的，这里不close
+    session = get_session()
+    async with session.post(url) as response:
+        print(f"📡 状态码: {response.status}")
+        print(f"📋 Content-Type: {response.headers.get('content-type')}")
+        print("\n📩 开始接收消息:\n")
+
+        decoder = SseDecoder()
+        async for chunk in response.content.iter_any():
+            for payload in decoder.feed(chunk):
                 try:
-                    message = json.loads(data_json)
+                    message = _loads(payload)
                     print(f"✅ [{message.get('type', 'unknown')}] {message.get('content', '')}")
                     print(f"   时间: {message.get('timestamp', 'N/A')}")
                     print()
-                except json.JSONDecodeError as e:
+                except ValueError as e:
                     print(f"❌ JSON 解析错误: {e}")
-                    print(f"   原始数据: {data_json}")
+                    print(f"   原始数据: {payload!r}")
                     print()
 
-except requests.exceptions.ConnectionError:
+
+try:
+    asyncio.run(main())
+except aiohttp.ClientConnectionError:
     print("❌ 连接失败！请确保服务器正在运行:")
     print("   python run.py")
 except Exception as e:
@@ -43,4 +55,3 @@ except Exception as e:
 
 print("=" * 60)
 print("✅ 测试完成")
-
@@ -5,18 +5,21 @@ FastAPI语音服务接口 - 专注于音频设备准备和播放功能
 """
 import os
 import json
-import base64
+import logging
+import math
 import time
+from binascii import a2b_base64, b2a_base64
 import wave
 import threading
-import queue
 import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import websocket
 from pathlib import Path
 from typing import Optional
 from contextlib import asynccontextmanager
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 import numpy as np
 import sounddevice as sd
 from fastapi import FastAPI, HTTPException
@@ -24,6 +27,25 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import asyncio
 
+try:
+    # WS读线程上每条response.audio.delta都要解析一次JSON，
+    # orjson比stdlib快数倍，读线程不会在delta突发时积压
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps  # 返回bytes，ws.send可直接发
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+
+try:
+    # libsndfile直接C解码MP3，跳过librosa的重量级导入和重采样链
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
 try:
     import librosa
     LIBROSA_AVAILABLE = True
@@ -37,6 +59,10 @@ try:
 except ImportError:
     FUNASR_AVAILABLE = False
 
+# 客户端热路径统一走logging的惰性格式化：级别不够时连字符串
+# 拼接都不发生，WS读线程不被每条delta的print串行化拖住
+log = logging.getLogger(__name__)
+
 # ==================== 配置参数 ====================
 
 # 语音大模型配置
@@ -76,11 +102,21 @@ LANG_MAP = {
 
 @dataclass
 class TurnBuf:
-    user_audio_16k: list = field(default_factory=list)  # list[np.float32]
+    # 用户音频在产生端就转成PCM16字节追加，turn结束直接写WAV，
+    # 不再攒一列float数组再np.concatenate整段拷贝一次
+    user_audio_16k: bytearray = field(default_factory=bytearray)  # PCM16 @ TARGET_SR
     ai_pcm_bytes: bytearray = field(default_factory=bytearray)
     asr_text: str = ""
     ai_text: str = ""
 
+    def clear(self):
+        """清空进入新一轮：bytearray的clear保留已扩出的容量，
+        首个长turn之后extend就不再触发重分配"""
+        self.user_audio_16k.clear()
+        self.ai_pcm_bytes.clear()
+        self.asr_text = ""
+        self.ai_text = ""
+
 class VoiceStreamRequest(BaseModel):
     timeout: Optional[int] = 30
     use_local_asr: Optional[bool] = True
@@ -88,35 +124,60 @@ class VoiceStreamRequest(BaseModel):
 
 # ==================== 工具函数 ====================
 
+# float→PCM16的复用缓冲：mic回调每20ms来一次，clip/乘法/转型
+# 各自分配临时数组是纯内存带宽浪费。按长度缓存每线程一组scratch，
+# 三个ufunc全部out=原地写，整条转换只剩tobytes()一次必要拷贝
+_pcm16_scratch = threading.local()
+
+
 def float_to_pcm16_bytes(f32: np.ndarray) -> bytes:
-    f32 = np.clip(f32, -1.0, 1.0)
-    return (f32 * 32767.0).astype(np.int16).tobytes()
+    n = len(f32)
+    bufs = getattr(_pcm16_scratch, 'bufs', None)
+    if bufs is None:
+        bufs = _pcm16_scratch.bufs = {}
+    pair = bufs.get(n)
+    if pair is None:
+        pair = bufs[n] = (np.empty(n, np.float32), np.empty(n, np.int16))
+    scale_buf, i16_buf = pair
+    np.multiply(f32, 32767.0, out=scale_buf)
+    np.clip(scale_buf, -32767.0, 32767.0, out=scale_buf)
+    i16_buf[:] = scale_buf
+    return i16_buf.tobytes()
 
 def pcm16_bytes_to_float(pcm: bytes) -> np.ndarray:
-    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32767.0
+    # int16→float32的加宽和缩放合成一次ufunc（乘以倒数，不做除法），
+    # 省掉astype的中间数组；用1/32768和编码端对称
+    return np.frombuffer(pcm, dtype=np.int16) * np.float32(1.0 / 32768.0)
+
+# binascii的a2b/b2a是base64模块底下的C原语，直接调用跳过
+# Python包装层的输入规范化，每条audio delta都省一点
 
 def b64_encode_pcm16_f32(f32: np.ndarray) -> str:
     """把 float32（-1..1）编码为 Base64(PCM16) 字符串"""
-    return base64.b64encode(float_to_pcm16_bytes(f32)).decode("ascii")
+    return b2a_base64(float_to_pcm16_bytes(f32), newline=False).decode("ascii")
 
 def b64_decode_pcm(b64: str) -> bytes:
-    return base64.b64decode(b64)
+    return a2b_base64(b64)
+
+# ASR HTTP调用共享一个带连接池的Session：keep-alive复用TCP连接，
+# 不再每轮识别都重新三次握手、重建连接池
+_ASR_SESSION = requests.Session()
+_ASR_SESSION.mount("http://", requests.adapters.HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+))
+
 
 def asr_tool_fun_local(audio_path, asr_url=None):
     """
     调用本地 ASR 接口（FastAPI /transcribe），默认 http://127.0.0.1:8000/transcribe
     识别中文；不返回时间戳，只取 text 字段。
     """
-    import os
-    import requests
-    from pathlib import Path
-
     if asr_url is None:
         asr_url = LOCAL_ASR_URL
 
     p = Path(audio_path)
     with p.open("rb") as f:
-        resp = requests.post(
+        resp = _ASR_SESSION.post(
             asr_url,
             files={"file": (p.name, f, "audio/wav")},
             data={"language": "chinese", "timestamps": "none", "task": "transcribe"},
@@ -154,6 +215,117 @@ def asr_with_funasr(audio_path):
         print(f"[ASR] FunASR error: {e}")
         return ""
 
+def asr_with_funasr_pcm(pcm16: bytes):
+    """
+    使用FunASR识别内存里的PCM16音频
+
+    FunASR的generate直接接受NumPy数组，进程内路径不必
+    先写WAV再让模型读回来——每轮省一次编码、一次解码
+    和两次磁盘往返。
+    """
+    if not FUNASR_AVAILABLE:
+        raise RuntimeError("FunASR not available")
+
+    global asr_model
+    if 'asr_model' not in globals():
+        raise RuntimeError("FunASR model not warmed up")
+
+    try:
+        audio = np.frombuffer(pcm16, dtype=np.int16) * np.float32(1.0 / 32768.0)
+        print(f"[ASR] Processing with FunASR: {len(audio)} samples in memory")
+        res = asr_model.generate(
+            input=audio,
+            fs=TARGET_SR,
+            cache={},
+            language="zn",
+            use_itn=True,
+            batch_size_s=60,
+        )
+        text_raw = res[0].get("text", "")
+        text = rich_transcription_postprocess(text_raw)
+        print(f"[ASR] FunASR result: {text}")
+        return text
+    except Exception as e:
+        print(f"[ASR] FunASR error: {e}")
+        return ""
+
+class _DropQueue:
+    """单生产者单消费者的音频通道：deque + Condition
+
+    queue.Queue每次put/get都走互斥锁加条件变量、满时还要抛/接
+    queue.Full（最慢的一条路径）。deque(maxlen)满时自动挤掉最旧
+    元素，保持"跟不上就丢"的语义但没有异常开销，每次操作只剩
+    一次加锁。
+    """
+
+    def __init__(self, maxlen: int):
+        self._dq = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            self._dq.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: float = None):
+        """取一个元素；超时返回None"""
+        with self._cond:
+            if not self._dq:
+                self._cond.wait(timeout)
+                if not self._dq:
+                    return None
+            return self._dq.popleft()
+
+
+class _FirDecimator:
+    """带抗混叠滤波的整数倍降采样器（纯NumPy，流式）
+
+    直接 chunk[::2] 抽取没有低通，12kHz以上的成分会混叠回
+    24kHz带内、拉低ASR识别率。这里用窗函数sinc设计FIR，
+    卷积在NumPy的C循环里跑；滤波状态跨块保留，块边界不会
+    产生咔哒声。
+    """
+
+    @classmethod
+    def for_rates(cls, in_sr: int, out_sr: int) -> "_FirDecimator":
+        """按实际采样率比构造，启动期就校验比例
+
+        SAMPLE_RATE // TARGET_SR 在48k→24k时恰好整除，但有人把
+        TARGET_SR改成16k时整除截断会静默产生错误步长——这里
+        约简比例后对非整数倍直接抛错，而不是录出坏音频。
+        """
+        g = math.gcd(in_sr, out_sr)
+        up, down = out_sr // g, in_sr // g
+        if up != 1:
+            raise ValueError(
+                f"仅支持整数倍降采样: {in_sr}Hz -> {out_sr}Hz "
+                f"需要 {up}/{down} 多相重采样"
+            )
+        return cls(down)
+
+    def __init__(self, factor: int, numtaps: int = 63):
+        self.factor = factor
+        m = np.arange(numtaps) - (numtaps - 1) / 2.0
+        # 截止频率（输入采样率的周期/样本）：压在输出奈奎斯特
+        # (0.5/factor)下方留出过渡带，既保住语音高频又压住折叠混叠
+        fc = 0.45 / factor
+        taps = 2.0 * fc * np.sinc(2.0 * fc * m) * np.hamming(numtaps)
+        taps /= taps.sum()  # 直流增益归一
+        self._taps = taps.astype(np.float32)
+        self._state = np.zeros(numtaps - 1, np.float32)
+        self._phase = 0
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        if self.factor == 1:
+            return chunk.copy()
+        x = np.concatenate((self._state, chunk))
+        y = np.convolve(x, self._taps, mode='valid')
+        self._state = x[-len(self._state):].copy()
+        out = np.ascontiguousarray(y[self._phase::self.factor])
+        self._phase = (self._phase - len(y)) % self.factor
+        return out
+
+
 # ==================== 语音大模型客户端 ====================
 
 class SimpleRealtimeClient:
@@ -170,17 +342,45 @@ class SimpleRealtimeClient:
         self.turn = TurnBuf()
         self.turns = []
 
-        self.mic_q: "queue.Queue[np.ndarray]" = queue.Queue(maxsize=200)
-        self.play_q: "queue.Queue[bytes]" = queue.Queue(maxsize=200)
+        self.mic_q = _DropQueue(maxlen=200)
+
+        # 播放环形缓冲：WS读线程写、PortAudio输出回调读。
+        # 流式TTS的delta到得比实时播放快，环要装得下一整段领先于
+        # 播放进度的回复——按秒数放量（30秒PCM16），太小会把回复
+        # 的尾巴悄悄丢掉
+        self._play_cap = OUTPUT_SR * 2 * 30
+        self._play_ring = bytearray(self._play_cap)
+        self._play_mv = memoryview(self._play_ring)
+        self._play_rd = 0
+        self._play_wr = 0
+        self._play_avail = 0
+        self._play_lock = threading.Lock()
+
+        # mic块的float32缓冲池：采集回调从池里取、_mic_loop用完归还，
+        # 长会话里每秒50次的分配/回收压力降到接近零
+        self._f32_pool: "deque[np.ndarray]" = deque(maxlen=32)
+
+        # 每秒50帧的append消息只有audio字段在变，JSON外壳预编码成
+        # 常量，热路径上拼三段bytes即可，不再每帧json.dumps整个dict
+        self._append_prefix = b'{"type":"input_audio_buffer.append","audio":"'
+
+        # 48k→24k降采样走抗混叠FIR，不再裸抽取；比例在启动期校验
+        self._decimator = _FirDecimator.for_rates(SAMPLE_RATE, TARGET_SR)
+
+        # WAV落盘和ASR派发都排进单工作线程，WS读线程不碰磁盘I/O
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wav-io")
 
         self.stream = None
-        self.player_thread = None
+        self._out_stream = None
         self.mic_thread = None
         self.device_index = device_index
 
         # 回调函数
         self.response_callback = None
         self.asr_callback = None
+        # 会话就绪钩子：session.updated到达时在WS线程上调用，
+        # 供上层用call_soon_threadsafe桥接到事件循环
+        self.on_session_ready = None
 
     def connect(self):
         headers = [f"Authorization: Bearer {API_KEY}"]
@@ -199,8 +399,8 @@ class SimpleRealtimeClient:
         self.ws_thread.start()
 
     def _on_open(self, ws):
-        print("[LLM] WebSocket connected")
-        ws.send(json.dumps({
+        log.info("[LLM] WebSocket connected")
+        ws.send(_dumps({
             "type": "session.update",
             "session": {
                 "turn_detection": {"type": "server_vad"},
@@ -211,45 +411,48 @@ class SimpleRealtimeClient:
         }))
 
     def _on_message(self, ws, msg):
-        data = json.loads(msg)
+        data = _loads(msg)
         t = data.get("type", "")
         self.last_event_ts = time.time()
 
         if t == "error":
-            print("[LLM] Server error:", data)
+            log.error("[LLM] Server error: %s", data)
             return
 
         if t == "session.updated":
-            print("[LLM] Session updated, ready")
+            log.info("[LLM] Session updated, ready")
             self.session_ready = True
+            if self.on_session_ready:
+                try:
+                    self.on_session_ready()
+                except Exception as e:
+                    log.warning("[LLM] Session ready hook error: %s", e)
 
         elif t == "input_audio_buffer.speech_started":
-            print("[LLM] Speech started")
-            self.turn = TurnBuf()
+            log.info("[LLM] Speech started")
+            # 复用同一个TurnBuf而不是整套重新分配
+            self.turn.clear()
 
         elif t == "input_audio_buffer.speech_stopped":
-            print("[LLM] Speech stopped, triggering generation")
-            self.ws.send(json.dumps({
+            log.info("[LLM] Speech stopped, triggering generation")
+            self.ws.send(_dumps({
                 "type": "response.create",
                 "response": {"modalities": ["text"]}
             }))
 
-            # 保存用户音频并发送给ASR
-            file_path = self._save_user_wav()
-            if file_path and self.asr_callback:
-                try:
-                    threading.Thread(target=self.asr_callback, args=(file_path,), daemon=True).start()
-                except Exception as e:
-                    print(f"[LLM] ASR callback error: {e}")
+            # 保存用户音频并发送给ASR——快照后整体投给IO线程，
+            # WAV编码、落盘和ASR派发都不占用WS读线程
+            pcm_snapshot = bytes(self.turn.user_audio_16k)
+            if pcm_snapshot:
+                self._io_pool.submit(
+                    self._save_user_and_dispatch, pcm_snapshot, self.round_id + 1
+                )
 
         elif t == "response.audio.delta":
             # 处理AI音频数据
             b = b64_decode_pcm(data.get("delta", ""))
             self.turn.ai_pcm_bytes.extend(b)
-            try:
-                self.play_q.put_nowait(b)
-            except queue.Full:
-                pass
+            self._ring_write(b)
         
         elif t == "response.audio_transcript.delta":
             self.turn.asr_text += data.get("delta", "")
@@ -257,15 +460,18 @@ class SimpleRealtimeClient:
         elif t == "response.text.delta":
             delta = data.get("delta", "")
             self.turn.ai_text += delta
-            print(f"[LLM] AI text delta: {delta}")
+            log.debug("[LLM] AI text delta: %s", delta)
 
         elif t == "response.done":
-            print(f"[LLM] Response done - User: {self.turn.asr_text}, AI: {self.turn.ai_text}")
+            log.info("[LLM] Response done - User: %s, AI: %s", self.turn.asr_text, self.turn.ai_text)
 
             asr_text = self.turn.asr_text.strip()
 
-            # 保存AI音频文件
-            self._save_ai_wav()
+            # 保存AI音频文件（快照交给IO线程，下一轮可继续复用缓冲）
+            if self.turn.ai_pcm_bytes:
+                self._io_pool.submit(
+                    self._save_ai_wav_bytes, bytes(self.turn.ai_pcm_bytes), self.round_id
+                )
 
             if self.response_callback:
                 try:
@@ -274,28 +480,37 @@ class SimpleRealtimeClient:
                         "ai_text": asr_text,
                     })
                 except Exception as e:
-                    print(f"[LLM] Response callback error: {e}")
+                    log.warning("[LLM] Response callback error: %s", e)
 
             self.round_id += 1
-            self.turns.append(self.turn)
+            # 历史里存不可变快照，活动缓冲留给下一轮复用
+            self.turns.append(replace(
+                self.turn,
+                user_audio_16k=bytes(self.turn.user_audio_16k),
+                ai_pcm_bytes=bytes(self.turn.ai_pcm_bytes),
+            ))
 
     def _on_error(self, ws, error):
-        print("[LLM] WebSocket error:", error)
+        log.error("[LLM] WebSocket error: %s", error)
 
     def _on_close(self, ws, code, msg):
-        print("[LLM] WebSocket closed:", code, msg)
+        log.info("[LLM] WebSocket closed: %s %s", code, msg)
         self.should_stop.set()
 
     def start_audio_chain(self):
         """启动音频采集链路"""
         def cb(indata, frames, time_info, status):
             if status:
-                print("[Mic] Status:", status)
+                log.warning("[Mic] Status: %s", status)
             mono = indata[:, 0] if indata.ndim > 1 else indata
-            try:
-                self.mic_q.put_nowait(mono.copy())
-            except queue.Full:
-                pass
+            # 复用池里的缓冲代替mono.copy()的新分配；长度不匹配
+            # （首块或blocksize变化）时才退回np.empty
+            pool = self._f32_pool
+            buf = pool.pop() if pool and len(pool[-1]) == len(mono) else None
+            if buf is None:
+                buf = np.empty(len(mono), np.float32)
+            np.copyto(buf, mono)
+            self.mic_q.put(buf)
 
         blocksize = int(SAMPLE_RATE * CHUNK_MS / 1000)
         self.stream = sd.InputStream(
@@ -307,99 +522,137 @@ class SimpleRealtimeClient:
             callback=cb,
         )
         self.stream.start()
-        print(f"[Mic] Audio input started: device#{self.device_index}, {SAMPLE_RATE} Hz")
+        log.info("[Mic] Audio input started: device#%s, %s Hz", self.device_index, SAMPLE_RATE)
 
         self.mic_thread = threading.Thread(target=self._mic_loop, daemon=True)
         self.mic_thread.start()
 
     def _mic_loop(self):
-        step = SAMPLE_RATE // TARGET_SR
         while not self.should_stop.is_set():
-            try:
-                chunk = self.mic_q.get(timeout=0.5)
-            except queue.Empty:
+            chunk = self.mic_q.get(timeout=0.5)
+            if chunk is None:
                 continue
 
-            down = chunk[::step] if step > 1 else chunk
-            self.turn.user_audio_16k.append(down)
+            # FIR降采样输出是独立的连续数组，大缓冲立刻还池
+            down = self._decimator.process(chunk)
+            self._f32_pool.append(chunk)
+
+            # PCM16只转换一次：同一份bytes既进turn累积缓冲也供发送
+            pcm = float_to_pcm16_bytes(down)
+            self.turn.user_audio_16k.extend(pcm)
 
             if self.session_ready:
                 try:
-                    self.ws.send(json.dumps({
-                        "type": "input_audio_buffer.append",
-                        "audio": b64_encode_pcm16_f32(down)
-                    }))
+                    # base64结果直接以bytes拼进预编码外壳发出，
+                    # 省掉.decode("ascii")和json.dumps的逐帧开销
+                    b64 = b2a_base64(pcm, newline=False)
+                    self.ws.send(self._append_prefix + b64 + b'"}')
                 except Exception as e:
-                    print("[LLM] Send audio error:", e)
-
-    def _save_user_wav(self):
-        if not self.turn.user_audio_16k:
-            return None
-        buf = np.concatenate(self.turn.user_audio_16k)
-        fname = f"user_round_{self.round_id + 1}.wav"
-        self._save_wav_16k(fname, buf)
-        print(f"[Save] User audio saved: {fname}")
-        return os.path.abspath(fname)
-
-    def _save_ai_wav(self):
-        """保存AI生成的音频文件"""
-        if not self.turn.ai_pcm_bytes:
-            return
-        fname = f"ai_round_{self.round_id}.wav"
+                    log.warning("[LLM] Send audio error: %s", e)
+
+    def _save_user_and_dispatch(self, pcm16: bytes, round_no: int):
+        """IO线程：派发ASR回调；没有回调方时才落盘存档
+
+        回调直接拿内存里的PCM16，由接收方决定要不要文件
+        （进程内FunASR完全不需要，HTTP回退自己写临时WAV）。
+        """
+        if self.asr_callback:
+            try:
+                self.asr_callback(pcm16)
+            except Exception as e:
+                log.warning("[LLM] ASR callback error: %s", e)
+        else:
+            fname = f"user_round_{round_no}.wav"
+            self._write_wav_pcm16(fname, pcm16)
+            log.info("[Save] User audio saved: %s", fname)
+
+    def _save_ai_wav_bytes(self, pcm16: bytes, round_no: int):
+        """IO线程：保存AI生成的音频文件"""
+        fname = f"ai_round_{round_no}.wav"
         with wave.open(fname, "wb") as wf:
             wf.setnchannels(1)
             wf.setsampwidth(2)          # PCM16
             wf.setframerate(OUTPUT_SR)  # 保存为输出采样率
-            wf.writeframes(bytes(self.turn.ai_pcm_bytes))
-        print(f"[LLM] AI audio saved: {fname}")
-
-    def start_player_thread(self):
-        """启动音频播放线程"""
-        self.player_thread = threading.Thread(target=self._player_loop, daemon=True)
-        self.player_thread.start()
-
-    def _player_loop(self):
-        """连续播放队列里的 PCM16 音频，避免卡顿和丢帧"""
-        with sd.OutputStream(
+            # wave接受buffer协议，memoryview免掉整段PCM（可达MB级）的
+            # bytes(...)拷贝
+            wf.writeframes(memoryview(pcm16))
+        log.info("[LLM] AI audio saved: %s", fname)
+
+    def start_player(self):
+        """启动回调模式的播放输出流
+
+        阻塞式stream.write每块都要等PortAudio收货，转换循环被音频
+        时钟串行化；回调模式下PortAudio按自己的节奏从环上拉数据，
+        省掉专门的播放线程和每块一次的上下文切换。
+        """
+        self._out_stream = sd.OutputStream(
             samplerate=OUTPUT_SR,
             channels=1,
             dtype="float32",
             blocksize=1024,   # 可以调整，越小延迟越低
-        ) as stream:
-            buffer = bytearray()
-            while not self.should_stop.is_set():
-                try:
-                    pcm = self.play_q.get(timeout=0.5)
-                    buffer.extend(pcm)
-                except queue.Empty:
-                    continue
-
-                # 每次写固定帧数，避免卡顿
-                frame_size = 1024  # 帧数 (samples)
-                bytes_per_frame = 2  # PCM16 = 2字节
-                while len(buffer) >= frame_size * bytes_per_frame:
-                    chunk = buffer[:frame_size * bytes_per_frame]
-                    buffer = buffer[frame_size * bytes_per_frame:]
-                    audio = pcm16_bytes_to_float(chunk)
-                    stream.write(audio)
+            callback=self._out_cb,
+        )
+        self._out_stream.start()
+
+    def _ring_write(self, pcm: bytes):
+        """WS读线程：把AI音频delta写进播放环（满则丢弃，与旧队列语义一致）"""
+        with self._play_lock:
+            n = len(pcm)
+            if n > self._play_cap - self._play_avail:
+                return
+            wr = self._play_wr
+            # 写入可能跨环口，最多两段memcpy
+            first = min(n, self._play_cap - wr)
+            self._play_mv[wr:wr + first] = pcm[:first]
+            if first < n:
+                self._play_mv[:n - first] = pcm[first:]
+            self._play_wr = (wr + n) % self._play_cap
+            self._play_avail += n
+
+    def _out_cb(self, outdata, frames, time_info, status):
+        """PortAudio回调：从环上取样本填充输出，欠载补静音"""
+        out = outdata[:, 0] if outdata.ndim > 1 else outdata
+        need = frames * 2
+        filled = 0
+        with self._play_lock:
+            take = min(need, self._play_avail) & ~1  # 按样本对齐
+            if take:
+                rd = self._play_rd
+                first = min(take, self._play_cap - rd)
+                out[:first >> 1] = pcm16_bytes_to_float(self._play_mv[rd:rd + first])
+                if first < take:
+                    out[first >> 1:take >> 1] = pcm16_bytes_to_float(
+                        self._play_mv[:take - first]
+                    )
+                self._play_rd = (rd + take) % self._play_cap
+                self._play_avail -= take
+                filled = take >> 1
+        if filled < frames:
+            out[filled:] = 0.0
 
     @staticmethod
-    def _save_wav_16k(fname: str, f32: np.ndarray):
-        pcm16 = float_to_pcm16_bytes(f32.astype(np.float32, copy=False))
+    def _write_wav_pcm16(fname: str, pcm16):
         with wave.open(fname, "wb") as wf:
             wf.setnchannels(1)
             wf.setsampwidth(2)
             wf.setframerate(OUTPUT_SR)
-            wf.writeframes(pcm16)
+            wf.writeframes(memoryview(pcm16))
 
     def close(self):
         self.should_stop.set()
+        self._io_pool.shutdown(wait=False)
         try:
             if self.stream:
                 self.stream.stop()
                 self.stream.close()
         except Exception:
             pass
+        try:
+            if self._out_stream:
+                self._out_stream.stop()
+                self._out_stream.close()
+        except Exception:
+            pass
         try:
             if self.ws:
                 self.ws.close()
@@ -412,6 +665,30 @@ class AudioManager:
         self.device_index = None
         self.is_initialized = False
         self._lock = threading.Lock()
+        # PortAudio枚举在部分平台上要几十毫秒，进程内查询一次缓存复用
+        self._devices = None
+        self._output_devices = None
+
+    def query_devices_cached(self):
+        """设备列表（缓存，服务启动时填充）"""
+        if self._devices is None:
+            self._devices = sd.query_devices()
+        return self._devices
+
+    def get_output_devices(self):
+        """输出设备摘要列表（缓存，/audio/devices直接返回）"""
+        if self._output_devices is None:
+            self._output_devices = [
+                {
+                    "id": i,
+                    "name": device.get('name', f'Device {i}'),
+                    "channels": device.get('max_output_channels', 0),
+                    "sample_rate": device.get('default_samplerate', 0),
+                }
+                for i, device in enumerate(self.query_devices_cached())
+                if device.get('max_output_channels', 0) > 0
+            ]
+        return self._output_devices
 
     def initialize_audio_device(self):
         """初始化音频设备"""
@@ -420,8 +697,8 @@ class AudioManager:
                 return True
 
             try:
-                # 获取默认输出设备
-                devices = sd.query_devices()
+                # 获取默认输出设备（走进程内缓存）
+                devices = self.query_devices_cached()
                 output_device = None
                 default_device = None
 
@@ -496,12 +773,22 @@ class AudioManager:
                 with wave.open(audio_file_path, 'rb') as wf:
                     sample_rate = wf.getframerate()
                     frames = wf.readframes(-1)
-                    audio_data = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32767.0
+                    # frombuffer零拷贝包住bytes，加宽+缩放合成一次ufunc
+                    # （与pcm16_bytes_to_float同款，见该函数说明）
+                    audio_data = np.frombuffer(frames, dtype=np.int16) * np.float32(1.0 / 32768.0)
 
             elif file_ext == '.mp3':
-                if not LIBROSA_AVAILABLE:
-                    raise RuntimeError("MP3 playback requires librosa library")
-                audio_data, sample_rate = librosa.load(audio_file_path, sr=None, mono=True)
+                if SOUNDFILE_AVAILABLE:
+                    # dtype已是float32，后面不需要astype；保持原采样率
+                    audio_data, sample_rate = sf.read(
+                        audio_file_path, dtype='float32', always_2d=False
+                    )
+                    if audio_data.ndim > 1:
+                        audio_data = audio_data.mean(axis=1)
+                elif LIBROSA_AVAILABLE:
+                    audio_data, sample_rate = librosa.load(audio_file_path, sr=None, mono=True)
+                else:
+                    raise RuntimeError("MP3 playback requires soundfile or librosa library")
 
             else:
                 raise ValueError(f"Unsupported audio format: {file_ext}")
@@ -604,41 +891,50 @@ async def voice_stream(request: VoiceStreamRequest):
             # 用于存储结果的容器
             result_container = {"asr_text": "", "ai_text": "", "completed": False}
             processing_complete = asyncio.Event()
+            # 回调都在后台线程上跑，asyncio.Event不是线程安全的——
+            # 统一经call_soon_threadsafe在事件循环里置位
+            loop = asyncio.get_running_loop()
+
+            def _mark_complete():
+                result_container["completed"] = True
+                loop.call_soon_threadsafe(processing_complete.set)
 
-            # ASR回调函数
-            def asr_callback(audio_path: str):
+            # ASR回调函数（收到的是内存里的PCM16字节）
+            def asr_callback(user_pcm: bytes):
                 """ASR识别回调"""
                 try:
-                    print(f"[{session_id}] Processing ASR for: {audio_path}")
+                    print(f"[{session_id}] Processing ASR for {len(user_pcm)} bytes of audio")
 
                     # 尝试使用本地ASR服务
                     if request.use_local_asr:
                         try:
-                            # 优先尝试本地FunASR
+                            # 优先尝试进程内FunASR：数组直接喂模型，零磁盘往返
                             if FUNASR_AVAILABLE:
-                                result_container["asr_text"] = asr_with_funasr(audio_path)
+                                result_container["asr_text"] = asr_with_funasr_pcm(user_pcm)
                                 print(f"[{session_id}] FunASR result: {result_container['asr_text']}")
                             else:
-                                # 回退到远程ASR服务
-                                result_container["asr_text"] = asr_tool_fun_local(audio_path)
+                                # 回退到远程ASR服务：HTTP接口要文件，写临时WAV用完即删
+                                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+                                    tmp_path = tmp.name
+                                SimpleRealtimeClient._write_wav_pcm16(tmp_path, user_pcm)
+                                try:
+                                    result_container["asr_text"] = asr_tool_fun_local(tmp_path)
+                                finally:
+                                    try:
+                                        os.unlink(tmp_path)
+                                    except OSError:
+                                        pass
                                 print(f"[{session_id}] Local ASR result: {result_container['asr_text']}")
                         except Exception as e:
                             print(f"[{session_id}] Local ASR failed: {e}")
 
                     # ASR完成后检查LLM是否也完成了
                     if result_container["ai_text"]:
-                        result_container["completed"] = True
-                        processing_complete.set()
+                        _mark_complete()
                         print(f"[{session_id}] ASR completed and LLM already completed, ready to yield results")
                     else:
                         print(f"[{session_id}] ASR completed but waiting for LLM result...")
 
-                    # 清理临时音频文件
-                    try:
-                        os.unlink(audio_path)
-                    except Exception:
-                        pass
-
                 except Exception as e:
                     print(f"[{session_id}] ASR callback error: {e}")
 
@@ -651,8 +947,7 @@ async def voice_stream(request: VoiceStreamRequest):
 
                     # 只有当ASR也完成时才标记为完成
                     if result_container["asr_text"]:
-                        result_container["completed"] = True
-                        processing_complete.set()
+                        _mark_complete()
                         print(f"[{session_id}] Both ASR and LLM completed, ready to yield results")
                     else:
                         print(f"[{session_id}] LLM completed but waiting for ASR result...")
@@ -669,20 +964,25 @@ async def voice_stream(request: VoiceStreamRequest):
                     realtime_client = SimpleRealtimeClient(device_index=audio_manager.device_index)
                     realtime_client.asr_callback = asr_callback
                     realtime_client.response_callback = response_callback
+
+                    # 会话就绪事件化：WS线程经call_soon_threadsafe置位，
+                    # 不再每0.5秒轮询一次（平均白等250ms还多出唤醒开销）
+                    session_ready_evt = asyncio.Event()
+                    realtime_client.on_session_ready = (
+                        lambda: loop.call_soon_threadsafe(session_ready_evt.set)
+                    )
                     realtime_client.connect()
                     print(f"[{session_id}] LLM client connecting...")
 
-                    # 等待会话准备就绪
-                    max_wait = 10  # 最多等待10秒
-                    wait_count = 0
-                    while not realtime_client.session_ready and wait_count < max_wait:
-                        await asyncio.sleep(0.5)
-                        wait_count += 0.5
-                        print(f"[{session_id}] Waiting for session ready... {wait_count}s")
+                    # 等待会话准备就绪（最多10秒）
+                    try:
+                        await asyncio.wait_for(session_ready_evt.wait(), timeout=10)
+                    except asyncio.TimeoutError:
+                        pass
 
                     if realtime_client.session_ready:
                         realtime_client.start_audio_chain()
-                        realtime_client.start_player_thread()
+                        realtime_client.start_player()
                         print(f"[{session_id}] LLM client started successfully - listening for speech...")
                     else:
                         print(f"[{session_id}] LLM client failed to initialize within timeout")
@@ -829,19 +1129,8 @@ async def list_audio_devices():
         音频设备列表
     """
     try:
-        devices = sd.query_devices()
-        output_devices = []
-
-        for i, device in enumerate(devices):
-            if device.get('max_output_channels', 0) > 0:
-                output_devices.append({
-                    "id": i,
-                    "name": device.get('name', f'Device {i}'),
-                    "channels": device.get('max_output_channels', 0),
-                    "sample_rate": device.get('default_samplerate', 0)
-                })
-
-        return {"devices": output_devices}
+        # 启动时缓存的列表直接返回，不再每个请求都查一遍PortAudio
+        return {"devices": audio_manager.get_output_devices()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 